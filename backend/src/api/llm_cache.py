@@ -0,0 +1,264 @@
+"""
+Content-addressed cache for chat completion responses.
+
+Responses are keyed on a hash of the request parameters (model, messages,
+tools, response_format, temperature and any other API arguments), so an
+identical prompt never hits the API twice while its entry is fresh. The
+default cache is two-tiered: an in-process LRU in front of an on-disk
+SQLite store shared by every process using the same file.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from config import settings
+
+
+def make_cache_key(api_params: Dict[str, Any]) -> str:
+    """Stable sha256 over the request parameters, ignoring unset (None) ones"""
+    material = {k: v for k, v in api_params.items() if v is not None}
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CacheEntry(NamedTuple):
+    value: str
+    # time.time() when the response was first cached, in whichever tier
+    created_at: float
+
+
+class LLMCache(ABC):
+    """Interface for response caches; values are serialized responses"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """The unexpired entry for key, with its creation time, or None"""
+
+    @abstractmethod
+    def set(self, key: str, value: str, created_at: Optional[float] = None) -> None:
+        """
+        Store value under key. created_at (default: now) lets an entry
+        copied from another tier keep its original age, and so its expiry.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryLRUCache(LLMCache):
+    """In-process LRU tier with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 86400):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.created_at > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, value: str, created_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(
+                value, time.time() if created_at is None else created_at
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": len(self._entries)}
+
+
+class SQLiteCache(LLMCache):
+    """
+    On-disk tier; evicts least recently used rows beyond max_entries.
+    Reads do not write: a hit moves a row's access time forward only when
+    it is more than touch_interval seconds old, and expired rows are
+    purged by set().
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        ttl_seconds: float = 86400,
+        touch_interval: float = 300,
+    ):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed "
+            "ON llm_cache(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, accessed_at FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            if now - row[2] > self.touch_interval:
+                self._conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+            self.hits += 1
+            return CacheEntry(row[0], row[1])
+
+    def set(self, key: str, value: str, created_at: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now if created_at is None else created_at, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return {**super().stats(), "entries": entries}
+
+
+class TieredCache(LLMCache):
+    """
+    Checks tiers in order and promotes hits into the faster tiers. A
+    promoted entry keeps its creation time, so it expires when the
+    original would.
+    """
+
+    def __init__(self, tiers: List[LLMCache]):
+        super().__init__()
+        self.tiers = tiers
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get_entry(key)
+            if entry is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, entry.value, created_at=entry.created_at)
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: str, created_at: Optional[float] = None) -> None:
+        for tier in self.tiers:
+            tier.set(key, value, created_at=created_at)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "tiers": {type(tier).__name__: tier.stats() for tier in self.tiers},
+        }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide cache, building the default one on first use"""
+    global _cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCache(
+                    [
+                        MemoryLRUCache(
+                            max_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+                            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                        ),
+                        SQLiteCache(
+                            settings.LLM_CACHE_PATH,
+                            max_entries=settings.LLM_CACHE_DISK_ENTRIES,
+                            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                        ),
+                    ]
+                )
+    return _cache
+
+
+def set_llm_cache(cache: Optional[LLMCache]) -> None:
+    """Replace the process-wide cache, e.g. with a custom LLMCache implementation"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,299 @@
+"""
+Process-wide governor for OpenAI calls.
+
+Every request goes through one LLMGovernor, which:
+- spaces requests to stay within requests-per-minute and tokens-per-minute
+  budgets (token buckets shared by every thread and coroutine),
+- retries rate limits, timeouts, connection errors and 5xx responses with
+  jittered exponential backoff, waiting as long as Retry-After asks,
+- opens a circuit breaker after repeated failures, so callers fail fast and
+  queued work can pause until the API recovers.
+
+The budgets are per process: the API and every worker process each enforce
+the configured limits on their own.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rough token estimate for budgeting; ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker is open; the call was not attempted"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM circuit breaker open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def estimate_tokens(api_params: Dict[str, Any]) -> int:
+    """Prompt size estimated from message text, plus the completion allowance"""
+    chars = 0
+    for message in api_params.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+    return chars // CHARS_PER_TOKEN + (api_params.get("max_tokens") or 0)
+
+
+def is_retryable(error: Exception) -> bool:
+    import openai
+
+    if isinstance(
+        error,
+        (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError),
+    ):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the server in Retry-After(-ms) headers, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+class TokenBucket:
+    """
+    Allows capacity units per minute. reserve() books units immediately and
+    returns how long the caller must wait before using them, so concurrent
+    callers queue up fairly without holding the lock while they sleep.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.balance = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, units: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.balance = min(self.capacity, self.balance + (now - self.updated) * self.rate)
+            self.updated = now
+            # A request larger than the whole bucket waits for a full bucket
+            self.balance -= min(units, self.capacity)
+            return max(0.0, -self.balance / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and stays open for
+    cooldown_seconds; then a single trial call is let through (half-open),
+    which closes the circuit on success or reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.cooldown_seconds:
+                return "open"
+            return "half_open"
+
+    def retry_after(self) -> float:
+        """Seconds until calls may be attempted again; 0 when not open"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown_seconds - time.monotonic())
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may be attempted now. Returns
+        True when the call is the half-open trial, which its caller must end
+        with record_success, record_failure or release_trial.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.opened_at + self.cooldown_seconds - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(remaining)
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.cooldown_seconds)
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a trial call that failed for reasons unrelated to the API's health"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LLMGovernor:
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200000,
+        max_retries: int = 4,
+        backoff_base_seconds: float = 1.0,
+        backoff_max_seconds: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+
+    def call(self, request: Callable[[], T], api_params: Dict[str, Any]) -> T:
+        """
+        Run a blocking API call under the budgets, retries and breaker. Its
+        waits block the thread, so never call it from event-loop code; use
+        call_async there.
+        """
+        if _in_event_loop():
+            logger.warning("Blocking LLM call made on the event loop thread; use call_async")
+        tokens = estimate_tokens(api_params)
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            try:
+                time.sleep(self._reserve(tokens))
+                result = request()
+            except Exception as e:
+                delay = self._on_error(e, attempt, trial)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def call_async(
+        self, request: Callable[[], Awaitable[T]], api_params: Dict[str, Any]
+    ) -> T:
+        """Async variant of call; request creates a fresh awaitable per attempt"""
+        tokens = estimate_tokens(api_params)
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            try:
+                await asyncio.sleep(self._reserve(tokens))
+                result = await request()
+            except Exception as e:
+                delay = self._on_error(e, attempt, trial)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled (client gone, shutdown): says nothing about the API,
+                # and a trial left in flight would keep the circuit from closing
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retries": self.retries,
+        }
+
+    def _reserve(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def _on_error(self, error: Exception, attempt: int, trial: bool = False) -> float:
+        """Re-raise errors that should not be retried; otherwise the delay before the next try"""
+        if not is_retryable(error):
+            # The API answered (bad request, auth...), so it is not an outage
+            if trial:
+                self.breaker.release_trial()
+            raise error
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise error
+        self.retries += 1
+        requested = retry_after_seconds(error)
+        if requested is not None:
+            return min(requested, self.backoff_max_seconds)
+        # Full jitter keeps retrying clients from synchronizing
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+_governor: Optional[LLMGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_llm_governor() -> LLMGovernor:
+    """The process-wide governor, configured from settings on first use"""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = LLMGovernor(
+                    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+                    max_retries=settings.LLM_MAX_RETRIES,
+                    backoff_base_seconds=settings.LLM_BACKOFF_BASE_SECONDS,
+                    backoff_max_seconds=settings.LLM_BACKOFF_MAX_SECONDS,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                        cooldown_seconds=settings.LLM_CIRCUIT_COOLDOWN_SECONDS,
+                    ),
+                )
+    return _governor
@@ -0,0 +1,429 @@
+"""
+Latency, token and cost accounting for LLM calls.
+
+Every chat completion made through api.openai_client is recorded once with
+the flow that made it (caller), the model, its latency and token usage,
+whether the response cache answered it and, for failures, the exception
+class; calls abandoned midway (a cancelled task, a stream whose client went
+away) are recorded as "cancelled", and streams that end without a finish
+reason as "incomplete". Records update in-process Prometheus counters and histograms
+immediately and are written to the llm_calls table in batches by a
+background thread; summarize() rolls the table up per caller and model.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from api.llm_governor import get_llm_governor
+from config import settings
+from db.session import SessionLocal
+from models.llm_call import LLMCall
+from sqlalchemy import case, func
+from utils.prometheus import format_labels, metric_header
+from utils.request_timing import current_trace
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Error classes for calls that never raised an exception of their own
+CANCELLED = "cancelled"
+INCOMPLETE = "incomplete"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Cost in USD; dated snapshots (gpt-4o-mini-2024-07-18) use their base
+    model's price
+    """
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        for name in sorted(MODEL_PRICES, key=len, reverse=True):
+            if model.startswith(name):
+                prices = MODEL_PRICES[name]
+                break
+        else:
+            return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+@dataclass
+class LLMCallRecord:
+    caller: str
+    model: str
+    latency_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_hit: bool = False
+    streamed: bool = False
+    error_class: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def cost_usd(self) -> float:
+        # Cache hits cost nothing, even though their usage is known
+        if self.cache_hit:
+            return 0.0
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def set_usage(self, usage) -> None:
+        """Copy token counts from a response's usage object, if it has one"""
+        if usage is not None:
+            self.prompt_tokens = usage.prompt_tokens or 0
+            self.completion_tokens = usage.completion_tokens or 0
+
+
+class LLMMetrics:
+    """Prometheus-style aggregates plus batched persistence of call records"""
+
+    def __init__(
+        self, db_factory=SessionLocal, flush_interval: float = 5.0, persist: bool = True
+    ):
+        self.db_factory = db_factory
+        self.flush_interval = flush_interval
+        self.persist = persist
+        self.requests: Dict[Tuple[str, str, str, str], int] = defaultdict(int)
+        self.errors: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.tokens: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.cost: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.latency_buckets: Dict[Tuple[str, str, str], List[int]] = {}
+        self.latency_sum: Dict[Tuple[str, str, str], float] = defaultdict(float)
+        self.latency_count: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self._pending: List[LLMCallRecord] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, call: LLMCallRecord) -> None:
+        cache = "hit" if call.cache_hit else "miss"
+        status = "error" if call.error_class else "ok"
+        with self._lock:
+            self.requests[(call.caller, call.model, cache, status)] += 1
+            if call.error_class:
+                self.errors[(call.caller, call.model, call.error_class)] += 1
+            if not call.cache_hit:
+                self.tokens[(call.caller, call.model, "prompt")] += call.prompt_tokens
+                self.tokens[
+                    (call.caller, call.model, "completion")
+                ] += call.completion_tokens
+                self.cost[(call.caller, call.model)] += call.cost_usd
+
+            key = (call.caller, call.model, cache)
+            buckets = self.latency_buckets.setdefault(key, [0] * len(LATENCY_BUCKETS))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if call.latency_seconds <= bound:
+                    buckets[i] += 1
+            self.latency_sum[key] += call.latency_seconds
+            self.latency_count[key] += 1
+
+            if self.persist:
+                self._pending.append(call)
+                self._ensure_flusher()
+
+    def flush(self) -> int:
+        """Write buffered records to llm_calls; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            try:
+                with self.db_factory() as db:
+                    db.add_all(
+                        LLMCall(
+                            created_at=call.created_at,
+                            caller=call.caller,
+                            model=call.model,
+                            latency_ms=call.latency_seconds * 1000,
+                            prompt_tokens=call.prompt_tokens,
+                            completion_tokens=call.completion_tokens,
+                            cost_usd=call.cost_usd,
+                            cache_hit=call.cache_hit,
+                            streamed=call.streamed,
+                            error_class=call.error_class,
+                        )
+                        for call in pending
+                    )
+                    db.commit()
+            except Exception:
+                logger.exception(f"Failed to store {len(pending)} LLM call records")
+                return 0
+            return len(pending)
+
+    def close(self) -> None:
+        """Stop the background flusher and write what is left"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def render_prometheus(self) -> str:
+        """Current aggregates in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines += metric_header(
+                "llm_requests_total", "counter", "LLM chat completion calls"
+            )
+            for (caller, model, cache, status), value in sorted(self.requests.items()):
+                labels = format_labels(
+                    caller=caller, model=model, cache=cache, status=status
+                )
+                lines.append(f"llm_requests_total{labels} {value}")
+
+            lines += metric_header(
+                "llm_errors_total", "counter", "Failed LLM calls by error class"
+            )
+            for (caller, model, error_class), value in sorted(self.errors.items()):
+                labels = format_labels(
+                    caller=caller, model=model, error_class=error_class
+                )
+                lines.append(f"llm_errors_total{labels} {value}")
+
+            lines += metric_header(
+                "llm_tokens_total", "counter", "Tokens billed, excluding cache hits"
+            )
+            for (caller, model, kind), value in sorted(self.tokens.items()):
+                labels = format_labels(caller=caller, model=model, type=kind)
+                lines.append(f"llm_tokens_total{labels} {value}")
+
+            lines += metric_header(
+                "llm_cost_usd_total", "counter", "Estimated LLM spend in USD"
+            )
+            for (caller, model), value in sorted(self.cost.items()):
+                labels = format_labels(caller=caller, model=model)
+                lines.append(f"llm_cost_usd_total{labels} {value:.6f}")
+
+            lines += metric_header(
+                "llm_request_duration_seconds", "histogram", "LLM call latency"
+            )
+            for key, buckets in sorted(self.latency_buckets.items()):
+                caller, model, cache = key
+                count, total = self.latency_count[key], self.latency_sum[key]
+                for bound, value in zip(LATENCY_BUCKETS, buckets):
+                    labels = format_labels(
+                        caller=caller, model=model, cache=cache, le=str(bound)
+                    )
+                    lines.append(f"llm_request_duration_seconds_bucket{labels} {value}")
+                labels = format_labels(
+                    caller=caller, model=model, cache=cache, le="+Inf"
+                )
+                lines.append(f"llm_request_duration_seconds_bucket{labels} {count}")
+                labels = format_labels(caller=caller, model=model, cache=cache)
+                lines.append(f"llm_request_duration_seconds_sum{labels} {total:.6f}")
+                lines.append(f"llm_request_duration_seconds_count{labels} {count}")
+
+        governor = get_llm_governor()
+        lines += metric_header(
+            "llm_retries_total", "counter", "LLM calls retried by the governor"
+        )
+        lines.append(f"llm_retries_total {governor.retries}")
+        lines += metric_header(
+            "llm_circuit_open", "gauge", "1 while the LLM circuit breaker is open"
+        )
+        lines.append(f"llm_circuit_open {int(governor.breaker.state != 'closed')}")
+        return "\n".join(lines) + "\n"
+
+    def summarize(self, hours: float = 24) -> Dict[str, Any]:
+        """
+        Rollup of stored calls from the last `hours` hours, per caller and
+        model. Counts, token and cost sums are grouped in SQL, and each
+        latency percentile is a single-row ORDER BY ... OFFSET query, so the
+        window's rows are never loaded into memory.
+        """
+        self.flush()
+        since = datetime.utcnow() - timedelta(hours=hours)
+        in_window = LLMCall.created_at >= since
+        billed = LLMCall.cache_hit.is_(False)
+        billed_latency = case((billed, LLMCall.latency_ms))
+        with self.db_factory() as db:
+            groups = (
+                db.query(
+                    LLMCall.caller,
+                    LLMCall.model,
+                    func.count().label("calls"),
+                    func.sum(case((billed, 0), else_=1)).label("cache_hits"),
+                    func.sum(case((billed, LLMCall.prompt_tokens), else_=0)).label(
+                        "prompt_tokens"
+                    ),
+                    func.sum(case((billed, LLMCall.completion_tokens), else_=0)).label(
+                        "completion_tokens"
+                    ),
+                    func.sum(LLMCall.cost_usd).label("cost_usd"),
+                    func.count(billed_latency).label("latency_count"),
+                    func.sum(billed_latency).label("latency_sum"),
+                    func.max(billed_latency).label("latency_max"),
+                )
+                .filter(in_window)
+                .group_by(LLMCall.caller, LLMCall.model)
+                .order_by(LLMCall.caller, LLMCall.model)
+                .all()
+            )
+            errors: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(dict)
+            for caller, model, error_class, count in (
+                db.query(
+                    LLMCall.caller, LLMCall.model, LLMCall.error_class, func.count()
+                )
+                .filter(in_window, LLMCall.error_class.isnot(None))
+                .group_by(LLMCall.caller, LLMCall.model, LLMCall.error_class)
+            ):
+                errors[(caller, model)][error_class] = count
+
+            def percentiles(count: int, *filters) -> Dict[str, Optional[float]]:
+                query = (
+                    db.query(LLMCall.latency_ms)
+                    .filter(in_window, billed, *filters)
+                    .order_by(LLMCall.latency_ms)
+                )
+                return {
+                    name: _percentile(query, count, fraction)
+                    for name, fraction in (("p50", 0.50), ("p95", 0.95))
+                }
+
+            breakdown = [
+                {
+                    "caller": group.caller,
+                    "model": group.model,
+                    **_rollup(
+                        [group],
+                        errors[(group.caller, group.model)],
+                        percentiles(
+                            group.latency_count,
+                            LLMCall.caller == group.caller,
+                            LLMCall.model == group.model,
+                        ),
+                    ),
+                }
+                for group in groups
+            ]
+            total_errors: Dict[str, int] = defaultdict(int)
+            for group_errors in errors.values():
+                for error_class, count in group_errors.items():
+                    total_errors[error_class] += count
+            totals = _rollup(
+                groups,
+                dict(total_errors),
+                percentiles(sum(group.latency_count for group in groups)),
+            )
+        return {
+            "since": since.isoformat(),
+            "hours": hours,
+            "totals": totals,
+            "by_caller": breakdown,
+        }
+
+    def _ensure_flusher(self) -> None:
+        # Called with self._lock held
+        if self._thread is None and not self._stop.is_set():
+            self._thread = threading.Thread(
+                target=self._flush_loop, name="llm-metrics-flush", daemon=True
+            )
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def _rollup(
+    groups, errors: Dict[str, int], percentiles: Dict[str, Optional[float]]
+) -> Dict[str, Any]:
+    """Combine per-(caller, model) aggregate rows from summarize() into one rollup"""
+    calls = sum(group.calls for group in groups)
+    cache_hits = sum(group.cache_hits or 0 for group in groups)
+    latency_count = sum(group.latency_count for group in groups)
+    latency_sum = sum(group.latency_sum or 0.0 for group in groups)
+    latency_max = max(
+        (group.latency_max for group in groups if group.latency_max is not None),
+        default=None,
+    )
+    return {
+        "calls": calls,
+        "cache_hits": cache_hits,
+        "cache_hit_rate": round(cache_hits / calls, 4) if calls else 0.0,
+        "errors": errors,
+        "prompt_tokens": sum(group.prompt_tokens or 0 for group in groups),
+        "completion_tokens": sum(group.completion_tokens or 0 for group in groups),
+        "cost_usd": round(sum(group.cost_usd or 0.0 for group in groups), 6),
+        "latency_ms": {
+            "avg": round(latency_sum / latency_count, 1) if latency_count else None,
+            "p50": percentiles["p50"],
+            "p95": percentiles["p95"],
+            "max": round(latency_max, 1) if latency_max is not None else None,
+        },
+    }
+
+
+def _percentile(ordered_query, count: int, fraction: float) -> Optional[float]:
+    """The value at `fraction` of a query ordered by latency, fetched as one row"""
+    if not count:
+        return None
+    value = (
+        ordered_query.offset(min(count - 1, int(fraction * count))).limit(1).scalar()
+    )
+    return round(value, 1) if value is not None else None
+
+
+@contextmanager
+def track_llm_call(
+    caller: str, api_params: Dict[str, Any], streamed: bool = False
+) -> Iterator[LLMCallRecord]:
+    """
+    Time the enclosed LLM call and record it on exit. The block marks cache
+    hits and copies token usage onto the yielded record; exceptions are
+    recorded by class and re-raised. Cancellation, and a generator closed
+    while the block is suspended in it, are recorded as CANCELLED.
+    """
+    call = LLMCallRecord(
+        caller=caller, model=api_params.get("model") or "unknown", streamed=streamed
+    )
+    start = time.perf_counter()
+    try:
+        yield call
+    except (asyncio.CancelledError, GeneratorExit):
+        call.error_class = CANCELLED
+        raise
+    except BaseException as e:
+        call.error_class = type(e).__name__
+        raise
+    finally:
+        call.latency_seconds = time.perf_counter() - start
+        trace = current_trace()
+        if trace is not None and not call.cache_hit:
+            trace.add_outbound("llm", call.latency_seconds)
+        try:
+            get_llm_metrics().record(call)
+        except Exception:
+            logger.exception("Failed to record LLM call metrics")
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """The process-wide LLM metrics recorder"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = LLMMetrics(
+                    flush_interval=settings.LLM_METRICS_FLUSH_SECONDS,
+                    persist=settings.LLM_METRICS_PERSIST,
+                )
+    return _metrics
@@ -1,35 +1,337 @@
 # Stub for OpenAI GPT client
+import asyncio
 import json
-import os
-from pathlib import Path
+import logging
+import threading
 
-from dotenv import load_dotenv
+from api.llm_cache import get_llm_cache, make_cache_key
+from api.llm_governor import CircuitOpenError, get_llm_governor
+from api.llm_metrics import INCOMPLETE, track_llm_call
+from config import settings
 
-# Load .env file from the backend directory
-backend_dir = Path(__file__).parent.parent.parent
-env_path = backend_dir / ".env"
-print(f"Loading .env from: {env_path}")
-print(f"File exists: {env_path.exists()}")
+logger = logging.getLogger(__name__)
 
-load_dotenv(env_path, override=True)
+MODEL = "gpt-4o-mini"
 
-api_key = os.getenv("OPENAI_API_KEY")
-print(f"API key loaded: {'Yes' if api_key else 'No'}")
+NOT_INITIALIZED_MESSAGE = (
+    "OpenAI client not initialized. Please check your OPENAI_API_KEY environment variable."
+)
+
+# Built on first use, so importing this module does not import the openai SDK
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """The shared OpenAI client, or None when OPENAI_API_KEY is not set"""
+    global _client
+    if _client is None and settings.OPENAI_API_KEY:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                # Retries are left to the LLM governor, which shares backoff across callers
+                _client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    return _client
+
+
+def get_async_openai_client():
+    """
+    The pooled AsyncOpenAI client shared by every coroutine in the process,
+    or None when OPENAI_API_KEY is not set.
+    """
+    global _async_client
+    if _async_client is None and settings.OPENAI_API_KEY:
+        with _client_lock:
+            if _async_client is None:
+                import httpx
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                _async_client = AsyncOpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    timeout=settings.OPENAI_TIMEOUT_SECONDS,
+                    max_retries=0,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+                        )
+                    ),
+                )
+    return _async_client
+
+
+async def close_openai_clients() -> None:
+    """Close the shared clients' connection pools; the next call builds new ones"""
+    global _client, _async_client
+    with _client_lock:
+        client, _client = _client, None
+        async_client, _async_client = _async_client, None
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.close()
+
+
+# Caps in-flight async requests; rebuilt if a different event loop is used
+_async_semaphore = None
+_async_semaphore_loop = None
+
+
+def _get_async_semaphore() -> asyncio.Semaphore:
+    global _async_semaphore, _async_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _async_semaphore is None or _async_semaphore_loop is not loop:
+        _async_semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+        _async_semaphore_loop = loop
+    return _async_semaphore
+
+
+def _build_api_params(messages, model, tools, enforce_json, kwargs):
+    api_params = {"model": model, "messages": messages, "tools": tools, **kwargs}
+    # Add JSON response format if requested
+    if enforce_json:
+        api_params["response_format"] = {"type": "json_object"}
+    return api_params
+
+
+def _parse_response(response, tools, enforce_json):
+    if response is None:
+        raise RuntimeError("OpenAI API returned None response")
+
+    # If tools are provided, return the raw response object
+    if tools:
+        return response
+
+    result = response.choices[0].message.content
+
+    # Parse JSON if requested, otherwise return raw text
+    if enforce_json:
+        return json.loads(result)
+    else:
+        return result
+
+
+def _log_failure(error, caller, api_params):
+    """Log a failed call; the request itself (whole prompts) only at debug level"""
+    logger.warning(
+        f"OpenAI API call failed: {error}",
+        extra={
+            "caller": caller,
+            "model": api_params.get("model"),
+            "error_class": type(error).__name__,
+        },
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Failed OpenAI request", extra={"api_params": api_params})
+
+
+def _is_cacheable(response) -> bool:
+    """Only complete answers are cached, not ones cut off by length or a content filter"""
+    choices = getattr(response, "choices", None)
+    return bool(choices) and all(
+        choice.finish_reason in ("stop", "tool_calls") for choice in choices
+    )
+
+
+def _cached_response(cache, key, validate=None):
+    from openai.types.chat import ChatCompletion
+
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    response = ChatCompletion.model_validate_json(cached)
+    if validate is not None:
+        try:
+            validate(response)
+        except Exception as e:
+            logger.debug(f"Ignoring cached OpenAI response that fails validation: {e}")
+            return None
+    logger.debug("OpenAI response served from cache")
+    return response
 
-MODEL = "gpt-4o-mini"
 
-# Only initialize OpenAI client if API key is available
-if api_key:
-    from openai import OpenAI
+def create_chat_completion(
+    api_params,
+    client=None,
+    use_cache=True,
+    caller="other",
+    validate=None,
+    refresh_cache=False,
+):
+    """
+    Call chat.completions.create through the response cache. Calls that
+    reach the API are paced, retried and circuit-broken by the LLM governor.
+
+    Args:
+        api_params: Keyword arguments for chat.completions.create
+        client: OpenAI client to use (default: the shared client)
+        use_cache: If False, bypass the cache for this call
+        refresh_cache: If True, skip the cache lookup but store the new
+                       response, replacing any cached answer
+        caller: Flow making the call, the label it is accounted under in
+                the LLM metrics (e.g. "assessment", "profile_generation")
+        validate: Optional check run on a fresh response before it is
+                  cached; if it raises, the response is not cached and the
+                  error propagates. Cached responses failing it are ignored.
+
+    Returns:
+        The ChatCompletion, either fresh or rebuilt from the cache. Only
+        responses that finished with "stop" or "tool_calls" are cached.
+    """
+    client = client or get_openai_client()
+    if client is None:
+        raise RuntimeError(NOT_INITIALIZED_MESSAGE)
+
+    with track_llm_call(caller, api_params) as call:
+        cache = get_llm_cache() if use_cache else None
+        key = make_cache_key(api_params) if cache else None
+        if cache and not refresh_cache:
+            response = _cached_response(cache, key, validate)
+            if response is not None:
+                call.cache_hit = True
+                call.set_usage(response.usage)
+                return response
+
+        response = get_llm_governor().call(
+            lambda: client.chat.completions.create(**api_params), api_params
+        )
+        call.set_usage(getattr(response, "usage", None))
+        if validate is not None:
+            validate(response)
+        if cache and _is_cacheable(response):
+            cache.set(key, response.model_dump_json())
+        return response
+
+
+async def create_chat_completion_async(
+    api_params,
+    client=None,
+    use_cache=True,
+    caller="other",
+    validate=None,
+    refresh_cache=False,
+):
+    """Async variant of create_chat_completion on the shared pooled client"""
+    client = client or get_async_openai_client()
+    if client is None:
+        raise RuntimeError(NOT_INITIALIZED_MESSAGE)
+
+    with track_llm_call(caller, api_params) as call:
+        cache = get_llm_cache() if use_cache else None
+        key = make_cache_key(api_params) if cache else None
+        if cache and not refresh_cache:
+            response = await asyncio.to_thread(_cached_response, cache, key, validate)
+            if response is not None:
+                call.cache_hit = True
+                call.set_usage(response.usage)
+                return response
+
+        async def request():
+            async with _get_async_semaphore():
+                return await client.chat.completions.create(**api_params)
+
+        response = await get_llm_governor().call_async(request, api_params)
+        call.set_usage(getattr(response, "usage", None))
+        if validate is not None:
+            validate(response)
+        if cache and _is_cacheable(response):
+            await asyncio.to_thread(cache.set, key, response.model_dump_json())
+        return response
+
+
+async def stream_chat_completion_async(
+    api_params, client=None, use_cache=True, caller="other", refresh_cache=False
+):
+    """
+    Stream the content of a chat completion as it is generated, yielding
+    text deltas. A cached response is replayed as a single delta, and a
+    completed stream is cached like a regular response under the same key.
+    """
+    from openai.types.chat import ChatCompletion
 
-    openai = OpenAI()
-    print("OpenAI client initialized successfully")
-else:
-    openai = None
-    print("OpenAI client NOT initialized - no API key")
+    client = client or get_async_openai_client()
+    if client is None:
+        raise RuntimeError(NOT_INITIALIZED_MESSAGE)
 
+    with track_llm_call(caller, api_params, streamed=True) as call:
+        cache = get_llm_cache() if use_cache else None
+        key = make_cache_key(api_params) if cache else None
+        if cache and not refresh_cache:
+            response = await asyncio.to_thread(_cached_response, cache, key)
+            if response is not None:
+                call.cache_hit = True
+                call.set_usage(response.usage)
+                yield response.choices[0].message.content or ""
+                return
 
-def gpt_chat_complete(messages, model=MODEL, tools=None, enforce_json=False, **kwargs):
+        parts = []
+        last_chunk = None
+        finish_reason = None
+        semaphore = _get_async_semaphore()
+
+        async def request():
+            # The slot is taken per attempt, so retry backoff does not hold it,
+            # and kept once the stream opens until it has been read
+            await semaphore.acquire()
+            try:
+                # include_usage adds a final chunk, without choices, carrying token usage
+                return await client.chat.completions.create(
+                    **api_params, stream=True, stream_options={"include_usage": True}
+                )
+            except BaseException:
+                semaphore.release()
+                raise
+
+        stream = await get_llm_governor().call_async(request, api_params)
+        try:
+            async for chunk in stream:
+                last_chunk = chunk
+                call.set_usage(getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield choice.delta.content
+                finish_reason = choice.finish_reason or finish_reason
+        finally:
+            semaphore.release()
+        if finish_reason is None:
+            # The stream closed before the model finished its answer
+            call.error_class = INCOMPLETE
+
+        # Only complete answers are cached
+        if cache and finish_reason == "stop":
+            response = ChatCompletion.model_validate(
+                {
+                    "id": last_chunk.id,
+                    "object": "chat.completion",
+                    "created": last_chunk.created,
+                    "model": last_chunk.model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(parts)},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": last_chunk.usage.model_dump() if last_chunk.usage else None,
+                }
+            )
+            await asyncio.to_thread(cache.set, key, response.model_dump_json())
+
+
+def gpt_chat_complete(
+    messages,
+    model=MODEL,
+    tools=None,
+    enforce_json=False,
+    use_cache=True,
+    caller="other",
+    **kwargs,
+):
     """
     Complete a chat conversation with GPT.
 
@@ -39,6 +341,8 @@ def gpt_chat_complete(messages, model=MODEL, tools=None, enforce_json=False, **k
         tools: List of tools to use (default: None)
         enforce_json: If True, forces JSON response format and returns parsed JSON.
                      If False, returns raw text response.
+        use_cache: If False, bypass the LLM response cache for this call
+        caller: Flow making the call, for the LLM metrics
         **kwargs: Additional arguments to pass to OpenAI API
 
     Returns:
@@ -47,39 +351,56 @@ def gpt_chat_complete(messages, model=MODEL, tools=None, enforce_json=False, **k
         If enforce_json=False: Raw text response string
     """
 
-    if openai is None:
-        raise RuntimeError(
-            "OpenAI client not initialized. Please check your OPENAI_API_KEY environment variable."
-        )
+    if get_openai_client() is None:
+        raise RuntimeError(NOT_INITIALIZED_MESSAGE)
 
     # Prepare API call parameters
-    api_params = {"model": model, "messages": messages, "tools": tools, **kwargs}
-    # Add JSON response format if requested
-    if enforce_json:
-        api_params["response_format"] = {"type": "json_object"}
+    api_params = _build_api_params(messages, model, tools, enforce_json, kwargs)
 
     try:
-        print(f"Making OpenAI API call with model: {model}")
-        response = openai.chat.completions.create(**api_params)
+        logger.debug(f"OpenAI call from {caller} with model {model}")
+        response = create_chat_completion(api_params, use_cache=use_cache, caller=caller)
+        return _parse_response(response, tools, enforce_json)
 
-        if response is None:
-            raise RuntimeError("OpenAI API returned None response")
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        _log_failure(e, caller, api_params)
+        raise RuntimeError(f"OpenAI API call failed: {str(e)}")
 
-        print(f"OpenAI API call successful, response type: {type(response)}")
 
-        # If tools are provided, return the raw response object
-        if tools:
-            return response
+async def gpt_chat_complete_async(
+    messages,
+    model=MODEL,
+    tools=None,
+    enforce_json=False,
+    use_cache=True,
+    caller="other",
+    **kwargs,
+):
+    """
+    Async variant of gpt_chat_complete for use from event-loop code.
 
-        result = response.choices[0].message.content
+    Uses the shared pooled AsyncOpenAI client, so the event loop keeps
+    serving other requests during the round trip. At most
+    OPENAI_MAX_CONCURRENCY calls are in flight per process; further calls
+    wait for a slot. Arguments and return values match gpt_chat_complete.
+    """
 
-        # Parse JSON if requested, otherwise return raw text
-        if enforce_json:
-            return json.loads(result)
-        else:
-            return result
+    if get_async_openai_client() is None:
+        raise RuntimeError(NOT_INITIALIZED_MESSAGE)
+
+    api_params = _build_api_params(messages, model, tools, enforce_json, kwargs)
+
+    try:
+        logger.debug(f"Async OpenAI call from {caller} with model {model}")
+        response = await create_chat_completion_async(
+            api_params, use_cache=use_cache, caller=caller
+        )
+        return _parse_response(response, tools, enforce_json)
 
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"OpenAI API call failed: {str(e)}")
-        print(f"API params: {api_params}")
+        _log_failure(e, caller, api_params)
         raise RuntimeError(f"OpenAI API call failed: {str(e)}")
@@ -16,7 +16,134 @@ class Settings(BaseSettings):
         "CORS_ORIGINS",
         "http://localhost:3000,http://localhost:5173,http://localhost:5174,http://127.0.0.1:5173,http://127.0.0.1:5174",
     )
+
+    # Connection pool (server databases such as Postgres)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # SQLite tuning, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_FOREIGN_KEYS: bool = os.getenv("SQLITE_FOREIGN_KEYS", "true").lower() == "true"
+
+    # Schema migrations (python -m migrations); data backfills commit every batch
+    DB_MIGRATE_ON_STARTUP: bool = os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true"
+    MIGRATION_BATCH_SIZE: int = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+    MIGRATION_BATCH_PAUSE_SECONDS: float = float(
+        os.getenv("MIGRATION_BATCH_PAUSE_SECONDS", "0.05")
+    )
+
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+
+    # Rate limits, retries and circuit breaker shared by every LLM call in a process.
+    # The limits are per process: the API and each worker enforce them separately,
+    # so set each to that process's share of the account's limits
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+    LLM_TOKENS_PER_MINUTE: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_BACKOFF_BASE_SECONDS: float = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1.0"))
+    LLM_BACKOFF_MAX_SECONDS: float = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    LLM_CIRCUIT_COOLDOWN_SECONDS: float = float(
+        os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", "30")
+    )
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", str(backend_dir / "llm_cache.db"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+    LLM_CACHE_DISK_ENTRIES: int = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "20000"))
+
+    # Logging: LOG_FORMAT is "json" or "text"; LOG_SAMPLE_RATE applies to sampled() messages
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+    # Request timing: requests slower than this log a trace of their SQL and outbound calls
+    SLOW_REQUEST_THRESHOLD_MS: float = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+    SLOW_REQUEST_TRACE_STATEMENTS: int = int(os.getenv("SLOW_REQUEST_TRACE_STATEMENTS", "10"))
+
+    # LLM call accounting (llm_calls table and /metrics)
+    LLM_METRICS_PERSIST: bool = os.getenv("LLM_METRICS_PERSIST", "true").lower() == "true"
+    LLM_METRICS_FLUSH_SECONDS: float = float(os.getenv("LLM_METRICS_FLUSH_SECONDS", "5"))
+
+    # Batch assessments
+    BATCH_ASSESSMENT_MAX_CONCURRENCY: int = int(
+        os.getenv("BATCH_ASSESSMENT_MAX_CONCURRENCY", "5")
+    )
+
+    # Assessment queue worker
+    ASSESSMENT_WORKER_CONCURRENCY: int = int(
+        os.getenv("ASSESSMENT_WORKER_CONCURRENCY", "4")
+    )
+    ASSESSMENT_LEASE_SECONDS: int = int(os.getenv("ASSESSMENT_LEASE_SECONDS", "300"))
+    ASSESSMENT_POLL_INTERVAL_SECONDS: float = float(
+        os.getenv("ASSESSMENT_POLL_INTERVAL_SECONDS", "2.0")
+    )
+    ASSESSMENT_MAX_ATTEMPTS: int = int(os.getenv("ASSESSMENT_MAX_ATTEMPTS", "3"))
+
+    # Profile generation source extraction
+    PROFILE_LINK_FETCH_PER_HOST: int = int(os.getenv("PROFILE_LINK_FETCH_PER_HOST", "2"))
+    PROFILE_LINK_FETCH_TIMEOUT_SECONDS: float = float(
+        os.getenv("PROFILE_LINK_FETCH_TIMEOUT_SECONDS", "45")
+    )
+    EXTRACTION_PROCESS_WORKERS: int = int(
+        os.getenv("EXTRACTION_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1)))
+    )
+    FILE_EXTRACT_MAX_PAGES: int = int(os.getenv("FILE_EXTRACT_MAX_PAGES", "10"))
+    FILE_EXTRACT_MAX_CHARS: int = int(os.getenv("FILE_EXTRACT_MAX_CHARS", "40000"))
+    PROFILE_PROMPT_MAX_TOKENS: int = int(os.getenv("PROFILE_PROMPT_MAX_TOKENS", "24000"))
+    PROFILE_PROMPT_SOURCE_MAX_TOKENS: int = int(
+        os.getenv("PROFILE_PROMPT_SOURCE_MAX_TOKENS", "8000")
+    )
+    # Extract sources in separate concurrent calls once there are this many
+    PROFILE_MAP_REDUCE_ENABLED: bool = (
+        os.getenv("PROFILE_MAP_REDUCE_ENABLED", "true").lower() == "true"
+    )
+    PROFILE_MAP_REDUCE_MIN_SOURCES: int = int(os.getenv("PROFILE_MAP_REDUCE_MIN_SOURCES", "3"))
+
+    # Shared async HTTP client for page fetches
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    HTTP_PER_HOST_CONCURRENCY: int = int(os.getenv("HTTP_PER_HOST_CONCURRENCY", "4"))
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_RETRY_BACKOFF_SECONDS: float = float(os.getenv("HTTP_RETRY_BACKOFF_SECONDS", "0.5"))
+    HTTP_RETRY_MAX_WAIT_SECONDS: float = float(os.getenv("HTTP_RETRY_MAX_WAIT_SECONDS", "30"))
+    HTTP_MAX_RESPONSE_BYTES: int = int(
+        os.getenv("HTTP_MAX_RESPONSE_BYTES", str(5 * 1024 * 1024))
+    )
+
+    # Page cache for scraped URLs
+    PAGE_CACHE_ENABLED: bool = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_PATH: str = os.getenv("PAGE_CACHE_PATH", str(backend_dir / "page_cache.db"))
+    PAGE_CACHE_MAX_BYTES: int = int(
+        os.getenv("PAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024))
+    )
+    PAGE_CACHE_DEFAULT_TTL_SECONDS: float = float(
+        os.getenv("PAGE_CACHE_DEFAULT_TTL_SECONDS", "86400")
+    )
+
+    # Shared Playwright browser for JavaScript-rendered pages
+    BROWSER_POOL_MAX_CONTEXTS: int = int(os.getenv("BROWSER_POOL_MAX_CONTEXTS", "4"))
+    BROWSER_CONTEXT_MAX_NAVIGATIONS: int = int(
+        os.getenv("BROWSER_CONTEXT_MAX_NAVIGATIONS", "50")
+    )
+    BROWSER_NAVIGATION_TIMEOUT_SECONDS: float = float(
+        os.getenv("BROWSER_NAVIGATION_TIMEOUT_SECONDS", "30")
+    )
+    BROWSER_BLOCK_RESOURCES: str = os.getenv("BROWSER_BLOCK_RESOURCES", "image,font,media")
 
     class Config:
         env_file = backend_dir / ".env"
@@ -1,4 +1,6 @@
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import case, or_
 from sqlalchemy.orm import Session
 from models.assessment import Assessment
 from models.opportunity import Opportunity
@@ -25,21 +27,150 @@ class AssessmentDAO:
         return assessment
 
     @staticmethod
-    def update_status(db: Session, assessment_id: int, status: str, message: str = None) -> None:
-        """Update assessment status"""
-        assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
-        if assessment:
-            assessment.status = status
-            if message and status == "failed":
-                assessment.summary = f"Error: {message}"
+    def enqueue(db: Session, opportunity_id: int, kind: str = "initial") -> Assessment:
+        """Queue an assessment for the worker, re-queueing it if it previously failed"""
+        assessment = AssessmentDAO.get_by_opportunity_and_kind(db, opportunity_id, kind)
+        if assessment is None:
+            return AssessmentDAO.create(db, opportunity_id=opportunity_id, kind=kind, status="pending")
+        if assessment.status == "failed":
+            assessment.status = "pending"
+            assessment.attempts = 0
+            AssessmentDAO._clear_lease(assessment)
+        return assessment
+
+    @staticmethod
+    def claim_next(db: Session, worker_id: str, lease_seconds: int, max_attempts: int) -> Optional[Assessment]:
+        """
+        Lease the oldest claimable pending assessment to worker_id.
+
+        A row is claimable when it is pending, has attempts left and holds no
+        live lease, so rows leased by a crashed worker become claimable again
+        once their lease expires. The claim is a conditional UPDATE, which
+        keeps it safe across concurrent workers and processes.
+        """
+        now = datetime.utcnow()
+        claimable = or_(Assessment.lease_expires_at.is_(None), Assessment.lease_expires_at < now)
+        candidates = (
+            db.query(Assessment.id)
+            .filter(Assessment.status == "pending", Assessment.attempts < max_attempts, claimable)
+            .order_by(Assessment.id)
+            .limit(10)
+            .all()
+        )
+        for (assessment_id,) in candidates:
+            claimed = (
+                db.query(Assessment)
+                .filter(Assessment.id == assessment_id, Assessment.status == "pending", claimable)
+                .update(
+                    {
+                        Assessment.leased_by: worker_id,
+                        Assessment.lease_expires_at: now + timedelta(seconds=lease_seconds),
+                        Assessment.attempts: Assessment.attempts + 1,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed:
+                return db.query(Assessment).filter(Assessment.id == assessment_id).first()
+        return None
+
+    @staticmethod
+    def release(
+        db: Session, assessment_id: int, refund_attempt: bool = False, leased_by: Optional[str] = None
+    ) -> bool:
+        """
+        Drop the lease on a pending assessment so another attempt can claim it.
+        refund_attempt gives back the attempt taken by the claim, for work that
+        never reached the LLM (e.g. while its circuit breaker is open). With
+        leased_by, nothing changes unless that worker still holds the lease.
+        """
+        values = {Assessment.leased_by: None, Assessment.lease_expires_at: None}
+        if refund_attempt:
+            values[Assessment.attempts] = case(
+                (Assessment.attempts > 0, Assessment.attempts - 1), else_=0
+            )
+        return AssessmentDAO._update_leased(db, assessment_id, leased_by, values)
+
+    @staticmethod
+    def renew_leases(db: Session, leased_by: List[str], lease_seconds: int) -> int:
+        """Push back the expiry of the pending assessments these workers hold"""
+        if not leased_by:
+            return 0
+        return (
+            db.query(Assessment)
+            .filter(Assessment.status == "pending", Assessment.leased_by.in_(leased_by))
+            .update(
+                {Assessment.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False,
+            )
+        )
+
+    @staticmethod
+    def fail_exhausted(db: Session, max_attempts: int) -> int:
+        """Mark pending assessments that used up their attempts as failed"""
+        now = datetime.utcnow()
+        return (
+            db.query(Assessment)
+            .filter(
+                Assessment.status == "pending",
+                Assessment.attempts >= max_attempts,
+                or_(Assessment.lease_expires_at.is_(None), Assessment.lease_expires_at < now),
+            )
+            .update(
+                {
+                    Assessment.status: "failed",
+                    Assessment.summary: f"Error: gave up after {max_attempts} attempts",
+                    Assessment.leased_by: None,
+                    Assessment.lease_expires_at: None,
+                },
+                synchronize_session=False,
+            )
+        )
+
+    @staticmethod
+    def update_status(
+        db: Session, assessment_id: int, status: str, message: str = None, leased_by: Optional[str] = None
+    ) -> bool:
+        """Update assessment status; with leased_by, only while that worker holds the lease"""
+        values = {
+            Assessment.status: status,
+            Assessment.leased_by: None,
+            Assessment.lease_expires_at: None,
+        }
+        if message and status == "failed":
+            values[Assessment.summary] = f"Error: {message}"
+        return AssessmentDAO._update_leased(db, assessment_id, leased_by, values)
+
+    @staticmethod
+    def update_success(
+        db: Session, assessment_id: int, summary: str, leased_by: Optional[str] = None
+    ) -> bool:
+        """
+        Update assessment with successful result. With leased_by, the row is
+        only updated while that worker still holds the lease, so a result that
+        arrives after the lease expired (and another worker claimed the row)
+        is dropped. Returns whether the row was updated.
+        """
+        values = {
+            Assessment.status: "succeeded",
+            Assessment.summary: summary,
+            Assessment.leased_by: None,
+            Assessment.lease_expires_at: None,
+        }
+        return AssessmentDAO._update_leased(db, assessment_id, leased_by, values)
+
+    @staticmethod
+    def _update_leased(db: Session, assessment_id: int, leased_by: Optional[str], values: dict) -> bool:
+        query = db.query(Assessment).filter(Assessment.id == assessment_id)
+        if leased_by is not None:
+            query = query.filter(Assessment.status == "pending", Assessment.leased_by == leased_by)
+        return query.update(values, synchronize_session=False) > 0
 
     @staticmethod
-    def update_success(db: Session, assessment_id: int, summary: str) -> None:
-        """Update assessment with successful result"""
-        assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
-        if assessment:
-            assessment.status = "succeeded"
-            assessment.summary = summary
+    def _clear_lease(assessment: Assessment) -> None:
+        assessment.leased_by = None
+        assessment.lease_expires_at = None
 
     @staticmethod
     def build_input_text_from_opportunity(opportunity: Opportunity) -> str:
@@ -1,8 +1,22 @@
+import base64
+import json
+from sqlalchemy import and_, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
+from models.assessment import Assessment
+from models.job_assessment import JobAssessment
 from models.opportunity import Opportunity
 from schemas import OpportunityCreate
 
+# Columns the opportunity list can be ordered by; ties are broken by id
+SORT_COLUMNS = {
+    "id": Opportunity.id,
+    "title": Opportunity.title,
+    "company": Opportunity.company,
+    "min_salary": Opportunity.min_salary,
+    "max_salary": Opportunity.max_salary,
+}
+
 
 class OpportunityDAO:
     @staticmethod
@@ -10,15 +24,141 @@ class OpportunityDAO:
         """Get opportunity by ID"""
         return db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
 
+
 def create_opportunity(db: Session, opportunity: OpportunityCreate) -> Opportunity:
     db_opportunity = Opportunity(**opportunity.model_dump())
     db.add(db_opportunity)
-    db.commit()
-    db.refresh(db_opportunity)
+    # Flushed for its id; the caller commits, e.g. together with its queued assessment
+    db.flush()
     return db_opportunity
 
-def get_opportunities(db: Session, skip: int = 0, limit: int = 100) -> List[Opportunity]:
-    return db.query(Opportunity).offset(skip).limit(limit).all()
+
+def encode_cursor(sort: str, order: str, sort_value: Any, opportunity_id: int) -> str:
+    payload = json.dumps({"s": sort, "o": order, "v": sort_value, "id": opportunity_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    """The (sort value, id) of the last row seen; the cursor must be for this sort and order"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        cursor_sort, cursor_order = payload["s"], payload["o"]
+        last_value, last_id = payload["v"], int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError(
+            f"Cursor was issued for sort={cursor_sort}&order={cursor_order}; "
+            "start again without a cursor to change the sort"
+        )
+    return last_value, last_id
+
+
+def get_opportunities(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    status: Optional[str] = None,
+    company: Optional[str] = None,
+    level: Optional[str] = None,
+    min_salary: Optional[int] = None,
+    max_salary: Optional[int] = None,
+    include_assessment: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    List opportunities in a deterministic (sort, id) order.
+
+    With a cursor from a previous page, the query seeks past the last row
+    seen (keyset pagination) instead of using OFFSET, so deep pages cost the
+    same as the first. NULL sort values come last in both directions, as a
+    segment of their own ordered by id: the seek on the non-NULL rows is a
+    row-value comparison the (sort column, id) index can serve directly.
+    Returns the page and the cursor for the next one (None on the last page).
+
+    With include_assessment, the same query outer-joins the job assessment
+    and the initial assessment, and each row is a tuple of
+    (Opportunity, fit_score, recommendation, assessment_status).
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Invalid sort: {sort}")
+    column = SORT_COLUMNS[sort]
+    descending = order == "desc"
+
+    query = db.query(Opportunity)
+    if include_assessment:
+        query = (
+            query.outerjoin(JobAssessment, JobAssessment.opportunity_id == Opportunity.id)
+            .outerjoin(
+                Assessment,
+                and_(Assessment.opportunity_id == Opportunity.id, Assessment.kind == "initial"),
+            )
+            .add_columns(
+                JobAssessment.fit_score,
+                JobAssessment.recommendation,
+                Assessment.status,
+            )
+        )
+    if status:
+        query = query.filter(Opportunity.status == status)
+    if company:
+        query = query.filter(Opportunity.company == company)
+    if level:
+        query = query.filter(Opportunity.level == level)
+    if min_salary is not None:
+        query = query.filter(Opportunity.min_salary >= min_salary)
+    if max_salary is not None:
+        query = query.filter(Opportunity.max_salary <= max_salary)
+
+    last_value = last_id = None
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort, order)
+
+    def by(col):
+        return col.desc() if descending else col.asc()
+
+    def id_after(last: int):
+        return Opportunity.id < last if descending else Opportunity.id > last
+
+    # Fetch one extra row to know whether another page exists
+    if column is Opportunity.id:
+        if cursor:
+            query = query.filter(id_after(last_id))
+        elif skip:
+            query = query.offset(skip)
+        rows = query.order_by(by(Opportunity.id)).limit(limit + 1).all()
+    elif skip and not cursor:
+        # OFFSET paging walks the whole ordering; kept for old clients
+        rows = (
+            query.order_by(by(column).nulls_last(), by(Opportunity.id))
+            .offset(skip)
+            .limit(limit + 1)
+            .all()
+        )
+    else:
+        rows = []
+        if last_id is None or last_value is not None:
+            seek = query.filter(column.isnot(None))
+            if last_id is not None:
+                key = tuple_(column, Opportunity.id)
+                seek = seek.filter(
+                    key < (last_value, last_id) if descending else key > (last_value, last_id)
+                )
+            rows = seek.order_by(by(column), by(Opportunity.id)).limit(limit + 1).all()
+        if len(rows) <= limit:
+            nulls = query.filter(column.is_(None))
+            if last_id is not None and last_value is None:
+                nulls = nulls.filter(id_after(last_id))
+            rows += nulls.order_by(by(Opportunity.id)).limit(limit + 1 - len(rows)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1][0] if include_assessment else rows[-1]
+    return rows, encode_cursor(sort, order, getattr(last, column.key), last.id)
+
 
 def delete_opportunity(db: Session, opportunity_id: int) -> bool:
     opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
@@ -26,4 +166,4 @@ def delete_opportunity(db: Session, opportunity_id: int) -> bool:
         return False
     db.delete(opportunity)
     db.commit()
-    return True 
\ No newline at end of file
+    return True
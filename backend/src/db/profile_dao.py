@@ -1,13 +1,16 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from models.profile import Profile
+from models.profile_entry import ProfileEntry as ProfileEntryModel
 from schemas import ProfileEntryCreate, ProfileEntry
 from typing import List, Optional
 import uuid
 
+
 class ProfileDAO:
     def __init__(self, db: Session):
         self.db = db
-    
+
     def get_or_create_profile(self, user_id: str = "default") -> Profile:
         """Get existing profile or create a new one"""
         profile = self.db.query(Profile).filter(Profile.user_id == user_id).first()
@@ -17,76 +20,104 @@ class ProfileDAO:
             self.db.commit()
             self.db.refresh(profile)
         return profile
-    
+
     def get_all_entries(self, user_id: str = "default") -> List[ProfileEntry]:
         """Get all profile entries for a user"""
         profile = self.get_or_create_profile(user_id)
-        entries_data = profile.get_entries()
-        return [ProfileEntry(**entry) for entry in entries_data]
-    
+        rows = (
+            self.db.query(ProfileEntryModel)
+            .filter(ProfileEntryModel.profile_id == profile.id)
+            .order_by(ProfileEntryModel.position)
+            .all()
+        )
+        return [ProfileEntry(**row.to_dict()) for row in rows]
+
     def create_entry(self, entry_data: ProfileEntryCreate, user_id: str = "default") -> ProfileEntry:
         """Create a new profile entry"""
         profile = self.get_or_create_profile(user_id)
-        
-        # Generate unique ID
-        entry_id = str(uuid.uuid4())
-        
-        # Create entry with ID
-        entry_dict = entry_data.model_dump()
-        entry_dict['id'] = entry_id
-        
-        # Add to profile
-        profile.add_entry(entry_dict)
+
+        row = self._new_row(profile.id, entry_data, self._next_position(profile.id))
+        self.db.add(row)
+        self._bump_version(profile)
         self.db.commit()
-        
-        return ProfileEntry(**entry_dict)
-    
+
+        return ProfileEntry(**row.to_dict())
+
     def update_entry(self, entry_id: str, entry_data: ProfileEntryCreate, user_id: str = "default") -> Optional[ProfileEntry]:
         """Update an existing profile entry"""
         profile = self.get_or_create_profile(user_id)
-        
-        # Create updated entry with ID
-        entry_dict = entry_data.model_dump()
-        entry_dict['id'] = entry_id
-        
-        # Update in profile
-        if profile.update_entry(entry_id, entry_dict):
-            self.db.commit()
-            return ProfileEntry(**entry_dict)
-        return None
-    
+
+        row = (
+            self.db.query(ProfileEntryModel)
+            .filter(ProfileEntryModel.profile_id == profile.id, ProfileEntryModel.id == entry_id)
+            .first()
+        )
+        if row is None:
+            return None
+
+        row.apply(entry_data.model_dump())
+        self._bump_version(profile)
+        self.db.commit()
+        return ProfileEntry(**row.to_dict())
+
     def delete_entry(self, entry_id: str, user_id: str = "default") -> bool:
         """Delete a profile entry"""
         profile = self.get_or_create_profile(user_id)
-        
-        if profile.delete_entry(entry_id):
+
+        deleted = (
+            self.db.query(ProfileEntryModel)
+            .filter(ProfileEntryModel.profile_id == profile.id, ProfileEntryModel.id == entry_id)
+            .delete(synchronize_session=False)
+        )
+        if deleted:
+            self._bump_version(profile)
             self.db.commit()
             return True
         return False
-    
+
     def delete_all_entries(self, user_id: str = "default") -> bool:
         """Delete all profile entries for a user"""
         profile = self.get_or_create_profile(user_id)
-        profile.clear_entries()
+        self.db.query(ProfileEntryModel).filter(
+            ProfileEntryModel.profile_id == profile.id
+        ).delete(synchronize_session=False)
+        self._bump_version(profile)
         self.db.commit()
         return True
-    
+
     def create_multiple_entries(self, entries_data: List[ProfileEntryCreate], user_id: str = "default") -> List[ProfileEntry]:
         """Create multiple profile entries atomically"""
         profile = self.get_or_create_profile(user_id)
-        created_entries = []
-        
-        for entry_data in entries_data:
-            # Generate unique ID
-            entry_id = str(uuid.uuid4())
-            
-            # Create entry with ID
-            entry_dict = entry_data.model_dump()
-            entry_dict['id'] = entry_id
-            
-            # Add to profile
-            profile.add_entry(entry_dict)
-            created_entries.append(ProfileEntry(**entry_dict))
-        
+        start = self._next_position(profile.id)
+
+        rows = [
+            self._new_row(profile.id, entry_data, start + offset)
+            for offset, entry_data in enumerate(entries_data)
+        ]
+        self.db.add_all(rows)
+        self._bump_version(profile)
         self.db.commit()
-        return created_entries 
\ No newline at end of file
+        return [ProfileEntry(**row.to_dict()) for row in rows]
+
+    def _bump_version(self, profile: Profile) -> None:
+        """Mark the profile as changed so assessments made from it become stale"""
+        self.db.query(Profile).filter(Profile.id == profile.id).update(
+            {Profile.version: func.coalesce(Profile.version, 1) + 1},
+            synchronize_session="fetch",
+        )
+
+    def _next_position(self, profile_id: int) -> int:
+        """Position after the last entry of a profile"""
+        last = (
+            self.db.query(func.max(ProfileEntryModel.position))
+            .filter(ProfileEntryModel.profile_id == profile_id)
+            .scalar()
+        )
+        return 0 if last is None else last + 1
+
+    @staticmethod
+    def _new_row(profile_id: int, entry_data: ProfileEntryCreate, position: int) -> ProfileEntryModel:
+        """Build a profile_entries row with a freshly generated ID"""
+        row = ProfileEntryModel(id=str(uuid.uuid4()), profile_id=profile_id, position=position)
+        row.apply(entry_data.model_dump())
+        return row
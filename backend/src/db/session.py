@@ -1,17 +1,72 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+    )
+else:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+if IS_SQLITE:
+
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite_connection(dbapi_connection, connection_record):
+        """
+        WAL lets readers proceed while a writer commits, and busy_timeout makes
+        competing writers wait instead of failing with "database is locked".
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE.upper()}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS.upper()}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if settings.SQLITE_FOREIGN_KEYS else 'OFF'}")
+        cursor.close()
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def init_db() -> None:
+    """
+    Bring the schema up to date; run once at process startup, not on import.
+    With DB_MIGRATE_ON_STARTUP off, migrations are left to
+    `python -m migrations` and pending ones are only reported.
+    """
+    from migrations.runner import pending_migrations, upgrade
+
+    if settings.DB_MIGRATE_ON_STARTUP:
+        upgrade(engine)
+        return
+    pending = pending_migrations(engine)
+    if pending:
+        logging.getLogger(__name__).warning(
+            f"{len(pending)} schema migrations pending, starting with "
+            f"{pending[0].version:04d}_{pending[0].name}; run python -m migrations"
+        )
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -1,10 +1,18 @@
+import asyncio
 import json
-from typing import List
+import logging
+from typing import Any, Dict, List, Optional
 
-from api.openai_client import gpt_chat_complete
+from api.openai_client import gpt_chat_complete_async
+from config import settings
+from logging_config import sampled
+from llm.profile_merge import merge_entries, resolve_by_order
+from llm.prompt_budget import PromptSection, build_budgeted_sections, count_tokens
 from llm.tools import profile_create
 from schemas import ProfileEntry, ProfileGenerationResponse, SourceContent
 
+logger = logging.getLogger(__name__)
+
 SYSTEM_PROMPT = """
 You are a professional resume and portfolio parser that extracts structured information from multiple sources including resumes, GitHub repositories, and other professional documents.
 
@@ -28,19 +36,7 @@ IMPORTANT: When combining information from multiple sources:
 - Ensure all professional experience is captured comprehensively
 """
 
-
-def generate_new_experience_profile(
-    sources: List[SourceContent],
-) -> ProfileGenerationResponse:
-    # Combine all content with source labels for better context
-    combined_content_parts = []
-    for source in sources:
-        source_label = f"[SOURCE: {source.source}]"
-        combined_content_parts.append(f"{source_label}\n{source.content}")
-
-    combined_content = "\n\n" + "=" * 50 + "\n\n".join(combined_content_parts)
-
-    user_message = f"""
+USER_PROMPT_TEMPLATE = """
     Please analyze the following combined content from multiple sources and extract a comprehensive professional profile.
     
     The content includes information from:
@@ -66,49 +62,228 @@ def generate_new_experience_profile(
     Extract as much professional experience as possible, including specific job responsibilities, achievements, and technical skills from all sources.
     """
 
-    try:
+MAP_PROMPT_TEMPLATE = """
+    Please extract every professional profile entry from the following single source: {source}
+    
+    Capture work experience, projects, education, technical skills and personal details as stated in this source.
+    Entries from other sources are combined in a later step, so do not add details that are not in this source.
+    
+    ---
+    {content}
+    ---
+    """
 
-        response = gpt_chat_complete(
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_message},
-            ],
-            tools=profile_create,
-            enforce_json=False,
-        )
+MERGE_PROMPT_TEMPLATE = """
+    Each group below holds versions of the same profile entry extracted from different sources, but their dates disagree.
+    
+    For each group, in order, return exactly one combined entry: choose the most plausible dates and keep every distinct key note.
+    
+    {groups}
+    """
+
+
+def _source_priority(source: SourceContent) -> int:
+    """The user's own description first, then uploaded files, then fetched links"""
+    if source.source == "description":
+        return 0
+    if source.source.startswith(("http://", "https://")):
+        return 2
+    return 1
+
+
+async def generate_new_experience_profile(
+    sources: List[SourceContent], map_reduce: Optional[bool] = None
+) -> ProfileGenerationResponse:
+    """
+    Build profile entries from the sources. With map_reduce (chosen
+    automatically when None), each source is extracted in its own concurrent
+    call and the results merged; otherwise all sources share one prompt.
+    """
+    if map_reduce is None:
+        map_reduce = _should_map_reduce(sources)
+    if map_reduce:
+        return await _generate_map_reduce(sources)
+    return await _generate_single(sources)
+
+
+def _should_map_reduce(sources: List[SourceContent]) -> bool:
+    if not settings.PROFILE_MAP_REDUCE_ENABLED or len(sources) < 2:
+        return False
+    if len(sources) >= settings.PROFILE_MAP_REDUCE_MIN_SOURCES:
+        return True
+    total = sum(count_tokens(source.content) for source in sources)
+    return total > settings.PROFILE_PROMPT_MAX_TOKENS
+
+
+def _source_label(source: str) -> str:
+    return f"[SOURCE: {source}]\n"
+
+
+async def _generate_single(sources: List[SourceContent]) -> ProfileGenerationResponse:
+    header = "\n\n" + "=" * 50
+    separator = "\n\n"
+    # Labels and separators are added around every kept section, so they
+    # come out of the budget too
+    section_overhead = max(
+        (count_tokens(_source_label(source.source) + separator) for source in sources),
+        default=0,
+    )
+    sections, report = build_budgeted_sections(
+        [
+            PromptSection(source.source, source.content, _source_priority(source))
+            for source in sources
+        ],
+        budget_tokens=settings.PROFILE_PROMPT_MAX_TOKENS
+        - count_tokens(SYSTEM_PROMPT + USER_PROMPT_TEMPLATE + header),
+        max_section_tokens=settings.PROFILE_PROMPT_SOURCE_MAX_TOKENS,
+        section_overhead_tokens=section_overhead,
+    )
+    logger.info(
+        f"Profile prompt budget: {report.summary()}", extra={"budget": report.to_dict()}
+    )
 
-        tool_calls = getattr(response.choices[0].message, "tool_calls", None)
-        if not tool_calls:
-            print(f"Unexpected response from LLM: {response}")
+    # Combine all content with source labels for better context
+    combined_content = header + separator.join(
+        _source_label(source.source) + source.content for source in sections
+    )
+
+    user_message = USER_PROMPT_TEMPLATE.format(combined_content=combined_content)
+
+    try:
+        entries = await _request_entries(user_message)
+        if entries is None:
             return ProfileGenerationResponse(
                 entries=[], message="No tool calls received from LLM"
             )
-        tool_call = tool_calls[0]
-        entries = json.loads(tool_call.function.arguments)["entries"]
-
-        # Remove GPT-generated ID if present and create ProfileEntry objects
-        parsed_entries = []
-        id_counter = 0
-        for e in entries:
-            print(f"Parsed entry: {e}")
-            print(f"Type of entry: {type(e)}")
-            if isinstance(e, dict):
-                # Automatically generate an id for the entry starting at 0
-                e["id"] = str(id_counter)
-                id_counter += 1
-
-                try:
-                    parsed_entries.append(ProfileEntry(**e))
-                except Exception as entry_error:
-                    print(f"Failed to parse entry {e}: {entry_error}")
-                    continue
-
         return ProfileGenerationResponse(
-            entries=parsed_entries, message="Generated from LLM"
+            entries=_to_profile_entries(entries), message="Generated from LLM"
         )
     except Exception as e:
-        print(f"Error in generate_new_experience_profile: {e}")
+        logger.exception(f"Profile generation failed: {e}")
         # Return empty response on error
         return ProfileGenerationResponse(
             entries=[], message=f"Error generating profile: {str(e)}"
         )
+
+
+async def _generate_map_reduce(
+    sources: List[SourceContent],
+) -> ProfileGenerationResponse:
+    """
+    Map: extract entries from every source concurrently, each in a small
+    prompt of its own. Reduce: merge the entries deterministically and ask
+    the LLM only about groups whose dates disagree.
+    """
+    # Highest priority sources first, so their details win in the merge
+    ordered = sorted(sources, key=_source_priority)
+    sections, report = build_budgeted_sections(
+        [
+            PromptSection(source.source, source.content, _source_priority(source))
+            for source in ordered
+        ],
+        budget_tokens=settings.PROFILE_PROMPT_SOURCE_MAX_TOKENS * len(ordered),
+        max_section_tokens=settings.PROFILE_PROMPT_SOURCE_MAX_TOKENS,
+    )
+    logger.info(
+        f"Profile map prompts: {report.summary()}", extra={"budget": report.to_dict()}
+    )
+
+    prompts = [
+        MAP_PROMPT_TEMPLATE.format(source=section.source, content=section.content)
+        for section in sections
+    ]
+    results = await asyncio.gather(
+        *(_request_entries(prompt) for prompt in prompts), return_exceptions=True
+    )
+    partials = []
+    for section, result in zip(sections, results):
+        if isinstance(result, Exception) or result is None:
+            logger.warning(f"Failed to extract entries from {section.source}: {result}")
+            continue
+        partials.append([entry for entry in result if isinstance(entry, dict)])
+
+    if not partials:
+        return ProfileGenerationResponse(
+            entries=[], message="Error generating profile: no source could be processed"
+        )
+
+    merged, conflicts = merge_entries(partials)
+    resolved = await _resolve_conflicts(conflicts)
+    # Put each resolved conflict back where its group first appeared
+    resolved_iter = iter(resolved)
+    entries = [entry if entry is not None else next(resolved_iter) for entry in merged]
+
+    return ProfileGenerationResponse(
+        entries=_to_profile_entries(entries),
+        message=f"Generated from LLM ({len(partials)} sources merged, "
+        f"{len(conflicts)} conflicts resolved)",
+    )
+
+
+async def _resolve_conflicts(
+    conflicts: List[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    One entry per conflicting group, from a single LLM call. If the call
+    fails or returns the wrong number of entries, each group falls back to
+    the dates of its highest priority source.
+    """
+    if not conflicts:
+        return []
+    groups = "\n\n".join(
+        f"[GROUP {number}]\n{json.dumps(group, indent=2)}"
+        for number, group in enumerate(conflicts, start=1)
+    )
+    try:
+        entries = await _request_entries(MERGE_PROMPT_TEMPLATE.format(groups=groups))
+        if entries is not None and len(entries) == len(conflicts):
+            return entries
+        logger.warning(
+            f"Conflict resolution returned {len(entries or [])} entries "
+            f"for {len(conflicts)} groups"
+        )
+    except Exception as e:
+        logger.warning(f"Failed to resolve profile conflicts: {e}")
+    return [resolve_by_order(group) for group in conflicts]
+
+
+async def _request_entries(user_message: str) -> Optional[List[Dict[str, Any]]]:
+    """Run one profile_create call; None when the model made no tool call"""
+    response = await gpt_chat_complete_async(
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_message},
+        ],
+        tools=profile_create,
+        enforce_json=False,
+        caller="profile_generation",
+    )
+
+    tool_calls = getattr(response.choices[0].message, "tool_calls", None)
+    if not tool_calls:
+        logger.warning("LLM response had no profile_create tool call")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Unexpected response from LLM: {response}")
+        return None
+    tool_call = tool_calls[0]
+    return json.loads(tool_call.function.arguments)["entries"]
+
+
+def _to_profile_entries(entries: List[Any]) -> List[ProfileEntry]:
+    # Remove GPT-generated ID if present and create ProfileEntry objects
+    parsed_entries = []
+    id_counter = 0
+    for e in entries:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Parsed entry: {e}", extra=sampled())
+        if isinstance(e, dict):
+            # Automatically generate an id for the entry starting at 0
+            e["id"] = str(id_counter)
+            id_counter += 1
+
+            try:
+                parsed_entries.append(ProfileEntry(**e))
+            except Exception as entry_error:
+                logger.warning(f"Failed to parse profile entry: {entry_error}")
+                continue
+    return parsed_entries
@@ -1,4 +1,4 @@
-from api.openai_client import gpt_chat_complete
+from api.openai_client import gpt_chat_complete_async
 from schemas import OpportunityCreate
 from utils.web_scraping import fetch_and_extract_text
 
@@ -22,12 +22,13 @@ If salary is not found, leave it null. If level is not clear, leave it null.
 async def parse_opportunity_from_link_async(link: str) -> OpportunityCreate:
     job_description_content = await fetch_and_extract_text(link)
 
-    gpt_response = gpt_chat_complete(
+    gpt_response = await gpt_chat_complete_async(
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": job_description_content},
         ],
         enforce_json=True,
+        caller="link_parsing",
     )
 
     parsed_opportunity = {
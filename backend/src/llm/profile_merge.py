@@ -0,0 +1,111 @@
+"""
+Deterministic merge of profile entries extracted from separate sources.
+
+Entries describe the same thing when type, organization and title match
+after normalization; an entry with neither organization nor title has
+nothing to match on and is kept on its own. Their dates merge when they
+agree; a date known in only one source, or known more precisely
+(2020-01-15 vs 2020-01), wins. Key notes are unioned. Groups whose
+dates genuinely disagree are returned as conflicts for the caller to
+resolve.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+Entry = Dict[str, Any]
+
+ONGOING_DATES = {"present", "current", "now", "ongoing"}
+
+
+class DateConflict(ValueError):
+    pass
+
+
+def _normalize(value: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (value or "").lower()).strip()
+
+
+def entry_key(entry: Entry) -> Tuple[str, str, str]:
+    return (
+        entry.get("type") or "",
+        _normalize(entry.get("organization")),
+        _normalize(entry.get("title")),
+    )
+
+
+def _merge_date(current: Optional[str], other: Optional[str]) -> Optional[str]:
+    """The more precise of two compatible dates; raises DateConflict otherwise"""
+    if not other:
+        return current
+    if not current:
+        return other
+    a, b = current.strip(), other.strip()
+    if a.lower() in ONGOING_DATES and b.lower() in ONGOING_DATES:
+        return current
+    if a.startswith(b):
+        return current
+    if b.startswith(a):
+        return other
+    raise DateConflict(f"{current} != {other}")
+
+
+def _merge_group(group: List[Entry], strict: bool = True) -> Entry:
+    """
+    Combine a group of matching entries. With strict=False, conflicting
+    dates do not raise; the earlier entry's date is kept.
+    """
+    merged = dict(group[0])
+    notes = list(merged.get("key_notes") or [])
+    seen_notes = {_normalize(note) for note in notes}
+    for entry in group[1:]:
+        for field in ("start_date", "end_date"):
+            try:
+                merged[field] = _merge_date(merged.get(field), entry.get(field))
+            except DateConflict:
+                if strict:
+                    raise
+        for field in ("title", "organization"):
+            if not merged.get(field) and entry.get(field):
+                merged[field] = entry[field]
+        for note in entry.get("key_notes") or []:
+            if _normalize(note) not in seen_notes:
+                seen_notes.add(_normalize(note))
+                notes.append(note)
+    merged["key_notes"] = notes
+    return merged
+
+
+def merge_entries(
+    partials: List[List[Entry]],
+) -> Tuple[List[Optional[Entry]], List[List[Entry]]]:
+    """
+    Merge per-source entry lists, in source order.
+
+    Returns the merged entries in first-seen order and the conflicting
+    groups. Each conflict leaves a None placeholder in the merged list at
+    the group's position, so resolved entries can be put back in place.
+    """
+    groups: Dict[Tuple[str, ...], List[Entry]] = {}
+    for entries in partials:
+        for entry in entries:
+            key: Tuple[str, ...] = entry_key(entry)
+            if not any(key[1:]):
+                # Nothing to identify it by, so give it a group of its own
+                key = (*key, str(len(groups)))
+            groups.setdefault(key, []).append(entry)
+
+    merged: List[Optional[Entry]] = []
+    conflicts: List[List[Entry]] = []
+    for group in groups.values():
+        try:
+            merged.append(_merge_group(group))
+        except DateConflict:
+            merged.append(None)
+            conflicts.append(group)
+    return merged, conflicts
+
+
+def resolve_by_order(group: List[Entry]) -> Entry:
+    """Fallback for a conflict: dates from the earliest source that has them"""
+    return _merge_group(group, strict=False)
@@ -0,0 +1,234 @@
+"""
+Token-budgeted assembly of source material for LLM prompts.
+
+Sources are deduplicated line by line (navigation menus, footers and text
+repeated between a resume and a portfolio page only count once), then
+each gets a share of the token budget: small sources keep everything and
+the rest is split evenly among the larger ones, which are cut at the end.
+If the budget cannot give every source a useful minimum, the lowest
+priority sources are dropped. The report records what was cut and why.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Heuristic used without tiktoken; English prose averages ~4 characters per token
+CHARS_PER_TOKEN = 4
+# Lines shorter than this (headings, bullets like "Python") are never deduplicated
+MIN_DEDUP_LINE_CHARS = 20
+TRUNCATION_MARKER = "\n[... truncated]"
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Tokens in text for the model, estimated from its length without tiktoken"""
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """The longest prefix within max_tokens, cut at a line break when possible"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if tiktoken is not None:
+        encoding = _encoding(model)
+        tokens = encoding.encode(text, disallowed_special=())
+        prefix = encoding.decode(tokens[:max_tokens])
+    else:
+        prefix = text[: max_tokens * CHARS_PER_TOKEN]
+    cut = prefix.rfind("\n")
+    if cut > len(prefix) // 2:
+        prefix = prefix[:cut]
+    return prefix
+
+
+@dataclass
+class PromptSection:
+    source: str
+    content: str
+    # Lower values are kept first when the budget forces sources to be dropped
+    priority: int = 0
+
+
+@dataclass
+class SectionReport:
+    source: str
+    original_tokens: int
+    kept_tokens: int = 0
+    duplicate_lines: int = 0
+    truncated: bool = False
+    dropped: bool = False
+
+
+@dataclass
+class BudgetReport:
+    budget_tokens: int
+    used_tokens: int = 0
+    sections: List[SectionReport] = field(default_factory=list)
+
+    @property
+    def dropped(self) -> List[str]:
+        return [section.source for section in self.sections if section.dropped]
+
+    @property
+    def truncated(self) -> List[str]:
+        return [section.source for section in self.sections if section.truncated]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.used_tokens,
+            "dropped": self.dropped,
+            "truncated": self.truncated,
+            "sections": [vars(section) for section in self.sections],
+        }
+
+    def summary(self) -> str:
+        parts = [f"{self.used_tokens}/{self.budget_tokens} tokens"]
+        if self.truncated:
+            parts.append(f"truncated: {', '.join(self.truncated)}")
+        if self.dropped:
+            parts.append(f"dropped: {', '.join(self.dropped)}")
+        return "; ".join(parts)
+
+
+def build_budgeted_sections(
+    sections: List[PromptSection],
+    budget_tokens: int,
+    max_section_tokens: Optional[int] = None,
+    min_section_tokens: int = 200,
+    model: str = "gpt-4o-mini",
+    section_overhead_tokens: int = 0,
+) -> Tuple[List[PromptSection], BudgetReport]:
+    """
+    Fit sections into budget_tokens, returning the kept sections in their
+    original order and a report of every cut. Higher priority sections are
+    deduplicated first, so a line shared with a lower priority source stays
+    in the higher priority one. section_overhead_tokens is the framing the
+    caller adds around each kept section (labels, separators); it comes out
+    of the budget along with the content.
+    """
+    report = BudgetReport(budget_tokens=budget_tokens)
+    reports = {}
+    seen_lines = set()
+    deduped: Dict[int, str] = {}
+    for index in sorted(range(len(sections)), key=lambda i: sections[i].priority):
+        section = sections[index]
+        content, duplicates = _dedupe_lines(section.content, seen_lines)
+        deduped[index] = content
+        reports[index] = SectionReport(
+            source=section.source,
+            original_tokens=count_tokens(section.content, model),
+            duplicate_lines=duplicates,
+        )
+    report.sections = [reports[index] for index in range(len(sections))]
+
+    sizes = {
+        index: count_tokens(content, model)
+        for index, content in deduped.items()
+        if content.strip()
+    }
+    for index in deduped:
+        if index not in sizes:
+            reports[index].dropped = True
+
+    # Drop the lowest priority sources until everyone left gets a useful
+    # share, as long as the sources that remain can still fill the budget
+    kept = sorted(sizes, key=lambda i: sections[i].priority)
+    capped = {
+        index: size if max_section_tokens is None else min(size, max_section_tokens)
+        for index, size in sizes.items()
+    }
+    allocations = _allocate(
+        sizes, kept, budget_tokens, max_section_tokens, section_overhead_tokens
+    )
+    while (
+        len(kept) > 1
+        and any(allocations[i] < min(min_section_tokens, sizes[i]) for i in kept)
+        and sum(capped[i] + section_overhead_tokens for i in kept[:-1])
+        >= budget_tokens
+    ):
+        reports[kept.pop()].dropped = True
+        allocations = _allocate(
+            sizes, kept, budget_tokens, max_section_tokens, section_overhead_tokens
+        )
+
+    result = []
+    for index in sorted(kept):
+        content = deduped[index]
+        if allocations[index] < sizes[index]:
+            content = truncate_to_tokens(content, allocations[index], model)
+            content += TRUNCATION_MARKER
+            reports[index].truncated = True
+        reports[index].kept_tokens = count_tokens(content, model)
+        result.append(
+            PromptSection(
+                source=sections[index].source,
+                content=content,
+                priority=sections[index].priority,
+            )
+        )
+    report.used_tokens = (
+        sum(section.kept_tokens for section in report.sections)
+        + section_overhead_tokens * len(result)
+    )
+    return result, report
+
+
+def _dedupe_lines(content: str, seen: set) -> Tuple[str, int]:
+    """Remove lines already present in an earlier section (or earlier in this one)"""
+    lines = []
+    duplicates = 0
+    for line in content.splitlines():
+        key = re.sub(r"\s+", " ", line).strip().lower()
+        if len(key) >= MIN_DEDUP_LINE_CHARS:
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+        lines.append(line)
+    return "\n".join(lines), duplicates
+
+
+def _allocate(
+    sizes: Dict[int, int],
+    indexes: List[int],
+    budget_tokens: int,
+    max_section_tokens: Optional[int],
+    section_overhead_tokens: int = 0,
+) -> Dict[int, int]:
+    """
+    Max-min fair split of the budget: smaller sections get all they need and
+    whatever they leave is shared evenly among the larger ones.
+    """
+    # Reserve room for each section's framing and, in case it gets cut, its
+    # truncation marker
+    marker_tokens = math.ceil(len(TRUNCATION_MARKER) / CHARS_PER_TOKEN)
+    reserved = (marker_tokens + section_overhead_tokens) * len(indexes)
+    remaining = max(budget_tokens - reserved, 0)
+    allocations = {}
+    ordered = sorted(indexes, key=lambda i: sizes[i])
+    for position, index in enumerate(ordered):
+        need = sizes[index]
+        if max_section_tokens is not None:
+            need = min(need, max_section_tokens)
+        share = remaining // (len(ordered) - position)
+        allocations[index] = min(need, share)
+        remaining -= allocations[index]
+    return allocations
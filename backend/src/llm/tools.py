@@ -1,8 +1,12 @@
-from typing import List
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List
 
-from openai.types.chat import ChatCompletionToolParam
 from schemas import ProfileGenerationRequest
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionToolParam
+
 profile_create: List[ChatCompletionToolParam] = [
     {
         "type": "function",
@@ -71,3 +75,36 @@ profile_create: List[ChatCompletionToolParam] = [
         },
     }
 ]
+
+assessment_create: List[ChatCompletionToolParam] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "assessment_create",
+            "description": "Record the job fit assessment.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "summary_of_fit": {
+                        "type": "string",
+                        "title": "Summary Of Fit",
+                        "description": "2-3 sentences on how well the role matches skills, experience, and career goals, including key strengths and potential gaps",
+                    },
+                    "fit_score": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": 7,
+                        "title": "Fit Score",
+                        "description": "1=poor fit, 7=excellent fit",
+                    },
+                    "recommendation": {
+                        "type": "string",
+                        "title": "Recommendation",
+                        "description": "1-2 sentences with an actionable recommendation",
+                    },
+                },
+                "required": ["summary_of_fit", "fit_score", "recommendation"],
+            },
+        },
+    }
+]
@@ -0,0 +1,137 @@
+"""
+Application logging.
+
+configure_logging() routes every record through a QueueHandler, so the
+thread that logs only enqueues; a QueueListener thread formats the
+records and writes them to stderr. Records are JSON lines (LOG_FORMAT=json,
+the default) or plain text, and carry the id of the HTTP request they
+were logged under. Verbose messages can be sampled:
+
+    logger.info(f"Parsed entry {entry_id}", extra=sampled())
+
+keeps about LOG_SAMPLE_RATE of them.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import traceback
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from config import settings
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def bind_request_id(request_id: Optional[str] = None):
+    """Set the request id for the current context; returns a token for reset_request_id"""
+    return _request_id.set(request_id or uuid.uuid4().hex[:16])
+
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+
+def sampled(rate: Optional[float] = None) -> Dict[str, Any]:
+    """`extra` for a verbose record that only needs to be kept some of the time"""
+    return {"sample_rate": settings.LOG_SAMPLE_RATE if rate is None else rate}
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request id and drops the unlucky sampled ones"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        if rate is not None and random.random() >= rate:
+            return False
+        record.request_id = _request_id.get() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", "-") != "-":
+            payload["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name != "sample_rate":
+                payload[name] = value
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Formats the message and traceback before enqueueing, like the stock
+    QueueHandler, but keeps the record's `extra` fields for the formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info))
+        record.exc_info = None
+        return record
+
+
+def configure_logging(
+    level: Optional[str] = None, fmt: Optional[str] = None, force: bool = False
+) -> None:
+    """
+    Install the queue-backed root handler; later calls do nothing unless
+    force is set, which a forked child process needs to start its own listener.
+    """
+    global _listener
+    if _listener is not None and not force:
+        return
+
+    handler = logging.StreamHandler(sys.stderr)
+    if (fmt or settings.LOG_FORMAT).lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s")
+        )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,18 +1,41 @@
-# Import models to ensure they are registered with SQLAlchemy
-import models.assessment
-import models.job_assessment
-import models.opportunity
-import models.profile
+from contextlib import asynccontextmanager
+
+from api.llm_metrics import get_llm_metrics
+from api.openai_client import close_openai_clients
 from config import settings
-from db.base import Base
-from db.session import engine
+from db.session import engine, init_db
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from logging_config import configure_logging, shutdown_logging
 from routes.assessments import router as assessments_router
+from routes.cache import router as cache_router
+from routes.metrics import router as metrics_router
 from routes.opportunities import router as opportunities_router
 from routes.profile import router as profile_router
+from utils.browser_pool import shutdown_browser_pool
+from utils.http_client import close_http_client
+from utils.process_pool import shutdown_process_pool
+from utils.request_timing import RequestTimingMiddleware, instrument_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging, SQL instrumentation, schema setup and client construction
+    # happen here rather than on import, so importing the app (tests,
+    # tooling, workers) starts no threads and touches no database
+    configure_logging()
+    instrument_engine(engine)
+    init_db()
+    yield
+    await close_openai_clients()
+    await close_http_client()
+    await shutdown_browser_pool()
+    shutdown_process_pool()
+    get_llm_metrics().close()
+    shutdown_logging()
 
-app = FastAPI(title="Job Opportunities API")
+
+app = FastAPI(title="Job Opportunities API", lifespan=lifespan)
 
 # Configure CORS
 origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()]
@@ -22,7 +45,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID"],
 )
+# Request ids for log correlation, and per-route latency, SQL and outbound call timing
+app.add_middleware(RequestTimingMiddleware)
 
 
 @app.get("/")
@@ -35,9 +61,8 @@ app.include_router(
 )
 app.include_router(profile_router, prefix="/profile", tags=["profile"])
 app.include_router(assessments_router, prefix="/assessments", tags=["assessments"])
-
-# Create tables on startup
-Base.metadata.create_all(bind=engine)
+app.include_router(cache_router, prefix="/cache", tags=["cache"])
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
 
 if __name__ == "__main__":
     import uvicorn
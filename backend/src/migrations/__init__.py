@@ -1 +1 @@
-# Migrations package
+# Versioned schema migrations: python -m migrations --help
@@ -0,0 +1,51 @@
+"""
+Apply or inspect schema migrations:
+
+    PYTHONPATH=src python -m migrations              # apply everything pending
+    PYTHONPATH=src python -m migrations --dry-run    # log the SQL, change nothing
+    PYTHONPATH=src python -m migrations --target 4
+    PYTHONPATH=src python -m migrations status
+"""
+
+import argparse
+
+from db.session import engine
+from logging_config import configure_logging
+from migrations.runner import applied_versions, upgrade
+from migrations.versions import MIGRATIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    parser.add_argument("--target", type=int, help="Stop after this version")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Log the statements instead of running them"
+    )
+    parser.add_argument("--batch-size", type=int, help="Rows per backfill batch")
+    args = parser.parse_args()
+
+    configure_logging(fmt="text")
+
+    if args.command == "status":
+        with engine.connect() as conn:
+            applied = applied_versions(conn)
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:04d}  {state:8}  {migration.name}")
+        return
+
+    results = upgrade(
+        engine, target=args.target, dry_run=args.dry_run, batch_size=args.batch_size
+    )
+    if not results:
+        print("Database is up to date")
+    for result in results:
+        print(
+            f"{result.version:04d}  {result.seconds * 1000:9.1f} ms  "
+            f"{len(result.statements):3d} statements  {result.name}"
+        )
+
+
+if __name__ == "__main__":
+    main()
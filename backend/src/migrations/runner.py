@@ -0,0 +1,330 @@
+"""
+Versioned schema migrations.
+
+Migrations are numbered steps (migrations.versions.MIGRATIONS) applied in
+order; each applied version is recorded in the schema_version table with
+how long it took. Steps are written to be idempotent, checking the live
+schema before changing it, so a database created by an older release (or
+by the old standalone scripts) upgrades cleanly from any point.
+
+DDL goes through MigrationContext, which emits it for the current dialect:
+on Postgres, indexes are built CONCURRENTLY and runs are serialized with an
+advisory lock. Data backfills run in id windows of MIGRATION_BATCH_SIZE rows,
+committing after each, so no statement holds a whole-table lock. With
+dry_run, nothing is written and the statements are logged instead.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from config import settings
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql import Executable
+
+logger = logging.getLogger(__name__)
+
+# Any constant works; it only has to be the same for every process
+ADVISORY_LOCK_KEY = 74_201_508
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Float, nullable=False),
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[["MigrationContext"], None]
+
+
+@dataclass
+class MigrationResult:
+    version: int
+    name: str
+    seconds: float
+    statements: List[str]
+
+
+class MigrationContext:
+    """Dialect-aware schema helpers for one migration step"""
+
+    def __init__(
+        self,
+        conn: Connection,
+        dry_run: bool = False,
+        batch_size: Optional[int] = None,
+        batch_pause: Optional[float] = None,
+    ):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self.dry_run = dry_run
+        self.batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+        self.batch_pause = (
+            settings.MIGRATION_BATCH_PAUSE_SECONDS if batch_pause is None else batch_pause
+        )
+        self.statements: List[str] = []
+        # Tables a dry run would have created; they already match the models
+        self._planned_tables: Set[str] = set()
+
+    @property
+    def is_postgres(self) -> bool:
+        return self.dialect == "postgresql"
+
+    def execute(self, statement: Union[str, Executable], params: Any = None):
+        """
+        Run a statement that changes the database; only logged on a dry run.
+        params is a dict, or a list of dicts for an executemany insert.
+        """
+        if isinstance(statement, str):
+            statement = text(statement)
+        self.statements.append(" ".join(str(statement).split()))
+        if self.dry_run:
+            logger.info(f"[dry run] {self.statements[-1]}")
+            return None
+        return self.conn.execute(statement, params or {})
+
+    def query(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        """Run a read-only statement, also on a dry run"""
+        return self.conn.execute(text(sql), params or {})
+
+    def commit(self) -> None:
+        if not self.dry_run:
+            self.conn.commit()
+
+    def has_table(self, table: str) -> bool:
+        return table in self._planned_tables or inspect(self.conn).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        if table in self._planned_tables:
+            return True
+        if not inspect(self.conn).has_table(table):
+            return False
+        return column in {c["name"] for c in inspect(self.conn).get_columns(table)}
+
+    def has_index(self, table: str, name: str) -> bool:
+        if table in self._planned_tables:
+            return True
+        if not inspect(self.conn).has_table(table):
+            return False
+        return name in {index["name"] for index in inspect(self.conn).get_indexes(table)}
+
+    def has_unique(self, table: str, columns: Sequence[str]) -> bool:
+        """Whether a unique constraint or unique index covers exactly these columns"""
+        if table in self._planned_tables:
+            return True
+        inspector = inspect(self.conn)
+        if not inspector.has_table(table):
+            return False
+        wanted = list(columns)
+        if any(c["column_names"] == wanted for c in inspector.get_unique_constraints(table)):
+            return True
+        return any(
+            index.get("unique") and index["column_names"] == wanted
+            for index in inspector.get_indexes(table)
+        )
+
+    def create_table(self, table: Table) -> None:
+        """Create a table and its indexes from its SQLAlchemy definition, if missing"""
+        if self.has_table(table.name):
+            return
+        self._planned_tables.add(table.name)
+        ddl = str(CreateTable(table).compile(dialect=self.conn.dialect)).strip()
+        self.statements.append(" ".join(ddl.split()))
+        if self.dry_run:
+            logger.info(f"[dry run] {self.statements[-1]}")
+            return
+        table.create(self.conn, checkfirst=True)
+
+    def add_column(self, table: str, column: str, ddl: str) -> bool:
+        """
+        ALTER TABLE ... ADD COLUMN, if the column is missing. Both SQLite and
+        Postgres (11+) add a nullable or constant-default column without
+        rewriting the table. Returns whether the column was added.
+        """
+        if self.has_column(table, column):
+            return False
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        return True
+
+    def create_index(
+        self, name: str, table: str, columns: Sequence[str], unique: bool = False
+    ) -> None:
+        """
+        Create an index if it does not exist. Postgres builds it CONCURRENTLY,
+        outside a transaction, so writes to the table carry on meanwhile.
+        """
+        if self.has_index(table, name):
+            return
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        on = f"{table} ({', '.join(columns)})"
+        if not self.is_postgres:
+            self.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {on}")
+            return
+        sql = f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {on}"
+        self.statements.append(sql)
+        if self.dry_run:
+            logger.info(f"[dry run] {sql}")
+            return
+        self.conn.commit()
+        with self.conn.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as autocommit:
+            autocommit.execute(text(sql))
+
+    def iter_batches(self, table: str, key: str = "id") -> Iterator[Tuple[int, int]]:
+        """
+        Yield (low, high] windows of batch_size over the integer key of table,
+        committing after each window so locks are held one batch at a time.
+        """
+        if not self.has_table(table) or table in self._planned_tables:
+            return
+        low, high = self.query(f"SELECT MIN({key}), MAX({key}) FROM {table}").one()
+        if low is None:
+            return
+        start = low - 1
+        while start < high:
+            end = start + self.batch_size
+            yield start, end
+            self.commit()
+            start = end
+            if self.batch_pause and not self.dry_run:
+                time.sleep(self.batch_pause)
+
+    def backfill(self, table: str, sql: str, key: str = "id") -> int:
+        """
+        Run an UPDATE/DELETE over table in key windows. sql must restrict
+        itself to the window with the :low and :high bind parameters
+        (`id > :low AND id <= :high`). Returns the number of rows changed.
+        """
+        started = time.perf_counter()
+        changed = 0
+        batches = 0
+        for low, high in self.iter_batches(table, key):
+            result = self.execute(sql, {"low": low, "high": high})
+            if result is not None and result.rowcount > 0:
+                changed += result.rowcount
+            batches += 1
+            if self.dry_run:
+                # One logged statement stands for every window
+                logger.info(f"[dry run] ... over {table} in batches of {self.batch_size}")
+                break
+        if batches:
+            logger.info(
+                f"Backfilled {changed} rows of {table} in {batches} batches "
+                f"({time.perf_counter() - started:.2f}s)"
+            )
+        return changed
+
+
+def applied_versions(conn: Connection) -> Set[int]:
+    if not inspect(conn).has_table(schema_version.name):
+        return set()
+    return {row.version for row in conn.execute(schema_version.select())}
+
+
+def pending_migrations(
+    engine: Engine, migrations: Optional[Sequence[Migration]] = None
+) -> List[Migration]:
+    """Migrations not yet recorded in schema_version, in order"""
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [m for m in _ordered(migrations) if m.version not in applied]
+
+
+def upgrade(
+    engine: Engine,
+    target: Optional[int] = None,
+    dry_run: bool = False,
+    migrations: Optional[Sequence[Migration]] = None,
+    batch_size: Optional[int] = None,
+) -> List[MigrationResult]:
+    """
+    Apply pending migrations up to and including target (default: all).
+    Each step commits on its own, so a failure leaves earlier steps applied
+    and the failed one is retried, idempotently, on the next run.
+    """
+    results = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            conn.commit()
+        try:
+            if not dry_run:
+                schema_version.create(conn, checkfirst=True)
+                conn.commit()
+            for migration in _ordered(migrations):
+                if target is not None and migration.version > target:
+                    break
+                # Re-read every step: another process may have applied it meanwhile
+                if migration.version in applied_versions(conn):
+                    continue
+                results.append(_apply(conn, migration, dry_run, batch_size))
+        finally:
+            if conn.dialect.name == "postgresql":
+                conn.rollback()
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY}
+                )
+                conn.commit()
+    return results
+
+
+def _apply(
+    conn: Connection, migration: Migration, dry_run: bool, batch_size: Optional[int]
+) -> MigrationResult:
+    label = f"{migration.version:04d}_{migration.name}"
+    logger.info(f"{'Planning' if dry_run else 'Applying'} migration {label}")
+    ctx = MigrationContext(conn, dry_run=dry_run, batch_size=batch_size)
+    started = time.perf_counter()
+    try:
+        migration.upgrade(ctx)
+        seconds = time.perf_counter() - started
+        if not dry_run:
+            conn.execute(
+                schema_version.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.utcnow(),
+                    duration_ms=seconds * 1000,
+                )
+            )
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        logger.exception(f"Migration {label} failed")
+        raise
+    logger.info(f"Migration {label} {'planned' if dry_run else 'applied'} in {seconds:.2f}s")
+    return MigrationResult(migration.version, migration.name, seconds, ctx.statements)
+
+
+def _ordered(migrations: Optional[Sequence[Migration]]) -> List[Migration]:
+    if migrations is None:
+        from migrations.versions import MIGRATIONS
+
+        migrations = MIGRATIONS
+    ordered = sorted(migrations, key=lambda m: m.version)
+    versions = [m.version for m in ordered]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {versions}")
+    return ordered
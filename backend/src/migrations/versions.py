@@ -0,0 +1,159 @@
+"""
+Schema history, oldest first.
+
+Append new steps with the next version number; never renumber or edit an
+applied one. Steps check the live schema before changing it (the context
+helpers do this), so each one is safe on databases that already have the
+change, e.g. because create_table built the table from the current model.
+"""
+
+import json
+import logging
+import uuid
+
+from migrations.runner import Migration, MigrationContext
+from models.assessment import Assessment
+from models.job_assessment import JobAssessment
+from models.llm_call import LLMCall
+from models.opportunity import Opportunity
+from models.profile import Profile
+from models.profile_entry import ProfileEntry
+from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+
+def initial_schema(ctx: MigrationContext) -> None:
+    """Core tables; creates whichever are missing"""
+    for model in (Opportunity, Profile, Assessment, JobAssessment):
+        ctx.create_table(model.__table__)
+
+
+def profile_version(ctx: MigrationContext) -> None:
+    ctx.add_column("profiles", "version", "INTEGER DEFAULT 1")
+
+
+def job_assessment_updated_at(ctx: MigrationContext) -> None:
+    # No column default: existing rows take created_at, new rows get it from the model
+    ctx.add_column("job_assessments", "updated_at", "TIMESTAMP")
+    ctx.backfill(
+        "job_assessments",
+        "UPDATE job_assessments SET updated_at = created_at "
+        "WHERE id > :low AND id <= :high AND updated_at IS NULL",
+    )
+
+
+def one_job_assessment_per_opportunity(ctx: MigrationContext) -> None:
+    """
+    Keep the newest assessment of each opportunity and make opportunity_id
+    unique. Replaces the old copy-and-recreate of the whole table with
+    batched deletes and an index build.
+    """
+    if ctx.has_unique("job_assessments", ["opportunity_id"]):
+        return
+    ctx.backfill(
+        "job_assessments",
+        "DELETE FROM job_assessments WHERE id > :low AND id <= :high AND EXISTS ("
+        "SELECT 1 FROM job_assessments AS newer "
+        "WHERE newer.opportunity_id = job_assessments.opportunity_id "
+        "AND newer.id > job_assessments.id)",
+    )
+    ctx.create_index(
+        "ux_job_assessments_opportunity", "job_assessments", ["opportunity_id"], unique=True
+    )
+
+
+def job_assessment_fingerprint(ctx: MigrationContext) -> None:
+    # Existing rows start out stale (NULL) and are re-assessed on demand
+    ctx.add_column("job_assessments", "opportunity_fingerprint", "VARCHAR(64)")
+
+
+def assessment_queue_columns(ctx: MigrationContext) -> None:
+    ctx.add_column("assessments", "attempts", "INTEGER NOT NULL DEFAULT 0")
+    ctx.add_column("assessments", "leased_by", "VARCHAR(128)")
+    ctx.add_column("assessments", "lease_expires_at", "TIMESTAMP")
+    ctx.create_index(
+        "ix_assessments_status_lease", "assessments", ["status", "lease_expires_at"]
+    )
+
+
+def split_profile_entries(ctx: MigrationContext) -> None:
+    """Move each profile's entries_json blob into profile_entries rows"""
+    entries_table = ProfileEntry.__table__
+    ctx.create_table(entries_table)
+
+    moved = 0
+    for low, high in ctx.iter_batches("profiles"):
+        profiles = ctx.query(
+            "SELECT id, entries_json FROM profiles "
+            "WHERE id > :low AND id <= :high "
+            "AND entries_json IS NOT NULL AND entries_json NOT IN ('', '[]')",
+            {"low": low, "high": high},
+        ).fetchall()
+        for profile_id, entries_json in profiles:
+            try:
+                entries = [entry for entry in json.loads(entries_json) if isinstance(entry, dict)]
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping profile {profile_id}: entries_json is not valid JSON")
+                continue
+
+            # Keep the entry ids the API handed out, unless another row already has one
+            wanted = [str(entry["id"]) for entry in entries if entry.get("id")]
+            taken = set()
+            if wanted and not ctx.dry_run:
+                taken = {
+                    row.id
+                    for row in ctx.conn.execute(
+                        select(entries_table.c.id).where(entries_table.c.id.in_(wanted))
+                    )
+                }
+            rows = []
+            for position, entry in enumerate(entries):
+                entry_id = str(entry.get("id") or uuid.uuid4())
+                if entry_id in taken:
+                    entry_id = str(uuid.uuid4())
+                taken.add(entry_id)
+                rows.append(
+                    {
+                        "id": entry_id,
+                        "profile_id": profile_id,
+                        "type": entry.get("type") or "experience",
+                        "title": entry.get("title"),
+                        "organization": entry.get("organization"),
+                        "start_date": entry.get("start_date"),
+                        "end_date": entry.get("end_date"),
+                        "key_notes_json": json.dumps(entry.get("key_notes") or []),
+                        "position": position,
+                    }
+                )
+            if rows:
+                ctx.execute(entries_table.insert(), rows)
+            ctx.execute(
+                "UPDATE profiles SET entries_json = '[]' WHERE id = :id", {"id": profile_id}
+            )
+            moved += len(rows)
+    if moved:
+        logger.info(f"Moved {moved} profile entries into profile_entries")
+
+
+def opportunity_list_indexes(ctx: MigrationContext) -> None:
+    """(filter/sort column, id) indexes behind the opportunity list's keyset pagination"""
+    for column in ("status", "company", "level", "title", "min_salary", "max_salary"):
+        ctx.create_index(f"ix_opportunities_{column}_id", "opportunities", [column, "id"])
+
+
+def llm_calls_table(ctx: MigrationContext) -> None:
+    ctx.create_table(LLMCall.__table__)
+
+
+MIGRATIONS = [
+    Migration(1, "initial_schema", initial_schema),
+    Migration(2, "profile_version", profile_version),
+    Migration(3, "job_assessment_updated_at", job_assessment_updated_at),
+    Migration(4, "one_job_assessment_per_opportunity", one_job_assessment_per_opportunity),
+    Migration(5, "job_assessment_fingerprint", job_assessment_fingerprint),
+    Migration(6, "assessment_queue_columns", assessment_queue_columns),
+    Migration(7, "split_profile_entries", split_profile_entries),
+    Migration(8, "opportunity_list_indexes", opportunity_list_indexes),
+    Migration(9, "llm_calls_table", llm_calls_table),
+]
@@ -2,4 +2,6 @@
 from .assessment import Assessment
 from .opportunity import Opportunity
 from .profile import Profile
-from .job_assessment import JobAssessment
\ No newline at end of file
+from .profile_entry import ProfileEntry
+from .job_assessment import JobAssessment
+from .llm_call import LLMCall
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, UniqueConstraint, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, UniqueConstraint, DateTime, Index, func
 from db.base import Base
 
 
@@ -13,6 +13,12 @@ class Assessment(Base):
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     updated_at = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
 
+    # Queue bookkeeping: a pending row is claimable when it has no lease or its lease expired
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    leased_by = Column(String(128), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
     __table_args__ = (
         UniqueConstraint("opportunity_id", "kind", name="uq_assessment_opp_kind"),
-    )
\ No newline at end of file
+        Index("ix_assessments_status_lease", "status", "lease_expires_at"),
+    )
@@ -27,6 +27,8 @@ class JobAssessment(Base):
         Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False
     )
     profile_version = Column(Integer, nullable=False)
+    # Hash of the opportunity fields in the prompt; NULL marks a fallback result
+    opportunity_fingerprint = Column(String(64), nullable=True)
 
     # Assessment results
     summary_of_fit = Column(Text, nullable=False)
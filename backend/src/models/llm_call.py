@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from db.base import Base
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String
+
+
+class LLMCall(Base):
+    """One chat completion request, as recorded by api.llm_metrics"""
+
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Flow that made the call, e.g. "assessment" or "profile_generation"
+    caller = Column(String(64), nullable=False)
+    model = Column(String(64), nullable=False)
+    latency_ms = Column(Float, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    # Estimated at call time; zero for responses served from the cache
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    streamed = Column(Boolean, nullable=False, default=False)
+    # Exception class name when the call failed
+    error_class = Column(String(64), nullable=True)
+
+    __table_args__ = (Index("ix_llm_calls_created_caller", "created_at", "caller"),)
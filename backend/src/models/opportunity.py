@@ -1,5 +1,5 @@
 from db.base import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 ALLOWED_STATUSES = [
@@ -26,4 +26,13 @@ class Opportunity(Base):
     company = Column(String, index=True)
     status = Column(String, default="To Apply", nullable=False)
 
-    __table_args__ = {"extend_existing": True}
+    # Composite indexes back the list filters and keyset pagination on (key, id)
+    __table_args__ = (
+        Index("ix_opportunities_status_id", "status", "id"),
+        Index("ix_opportunities_company_id", "company", "id"),
+        Index("ix_opportunities_level_id", "level", "id"),
+        Index("ix_opportunities_title_id", "title", "id"),
+        Index("ix_opportunities_min_salary_id", "min_salary", "id"),
+        Index("ix_opportunities_max_salary_id", "max_salary", "id"),
+        {"extend_existing": True},
+    )
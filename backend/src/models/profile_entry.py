@@ -0,0 +1,61 @@
+import json
+from typing import Any, Dict, List
+
+from db.base import Base
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Text
+
+
+class ProfileEntry(Base):
+    __tablename__ = "profile_entries"
+
+    id = Column(String(64), primary_key=True)  # Entry id exposed by the API
+    profile_id = Column(
+        Integer,
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    type = Column(String(32), nullable=False, index=True)
+    title = Column(String, nullable=True)
+    organization = Column(String, nullable=True)
+    start_date = Column(String(10), nullable=True)  # YYYY-MM-DD format
+    end_date = Column(String(10), nullable=True)  # YYYY-MM-DD format
+    key_notes_json = Column(Text, default="[]")  # Store as JSON string
+    position = Column(Integer, nullable=False, default=0)  # Display order
+
+    __table_args__ = (
+        Index("ix_profile_entries_profile_type", "profile_id", "type"),
+        {"extend_existing": True},
+    )
+
+    def get_key_notes(self) -> List[str]:
+        """Get key notes as a list of strings"""
+        try:
+            return json.loads(self.key_notes_json) if self.key_notes_json else []
+        except json.JSONDecodeError:
+            return []
+
+    def set_key_notes(self, key_notes: List[str]) -> None:
+        """Set key notes from a list of strings"""
+        self.key_notes_json = json.dumps(key_notes or [], default=str)
+
+    def apply(self, entry: Dict[str, Any]) -> None:
+        """Copy entry fields from a dictionary onto this row"""
+        self.type = entry.get("type")
+        self.title = entry.get("title")
+        self.organization = entry.get("organization")
+        self.start_date = entry.get("start_date")
+        self.end_date = entry.get("end_date")
+        self.set_key_notes(entry.get("key_notes", []))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Entry as a dictionary, in the shape of the old entries_json items"""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "title": self.title,
+            "organization": self.organization,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "key_notes": self.get_key_notes(),
+        }
@@ -1,12 +1,16 @@
-from typing import List
+import json
+from typing import List, Optional
 
 from db.session import get_db
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from models.job_assessment import JobAssessment
 from models.opportunity import Opportunity
 from models.profile import Profile
+from schemas import BatchAssessmentJob, BatchAssessmentRequest
 from schemas import JobAssessment as JobAssessmentSchema
 from schemas import JobAssessmentCreate
+from services.batch_assessment_service import BatchAssessmentService
 from services.job_assessment_service import AssessmentService
 from sqlalchemy.orm import Session, joinedload
 
@@ -17,6 +21,18 @@ def get_assessment_service():
     return AssessmentService()
 
 
+def get_default_profile(db: Session) -> Profile:
+    # Get the default profile (user_id="default")
+    profile = db.query(Profile).filter(Profile.user_id == "default").first()
+    if not profile:
+        # Create the default profile if it doesn't exist
+        profile = Profile(user_id="default")
+        db.add(profile)
+        db.commit()
+        db.refresh(profile)
+    return profile
+
+
 @router.post(
     "/opportunities/{opportunity_id}/assess", response_model=JobAssessmentSchema
 )
@@ -26,24 +42,25 @@ async def create_assessment(
     db: Session = Depends(get_db),
     assessment_service: AssessmentService = Depends(get_assessment_service),
     profile_id: int = 1,  # Default to profile ID 1 (the default profile)
+    use_cache: bool = True,
+    force: bool = False,
 ):
-    """Generate job assessment for opportunity-profile pair"""
+    """
+    Generate job assessment for opportunity-profile pair. The stored
+    assessment is returned unchanged while it is fresh, unless force is set;
+    a forced assessment skips the LLM response cache too.
+    """
 
     opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
     if not opportunity:
         raise HTTPException(status_code=404, detail="Opportunity not found")
 
-    # Get the default profile (user_id="default")
-    profile = db.query(Profile).filter(Profile.user_id == "default").first()
-    if not profile:
-        # Create the default profile if it doesn't exist
-        profile = Profile(user_id="default")
-        db.add(profile)
-        db.commit()
-        db.refresh(profile)
+    profile = get_default_profile(db)
 
     # Generate assessment
-    assessment = assessment_service.assess_opportunity(opportunity, profile, db)
+    assessment = await assessment_service.assess_opportunity_async(
+        opportunity, profile, db, use_cache=use_cache, force=force
+    )
 
     if assessment.id is None:  # New assessment
         db.add(assessment)
@@ -53,6 +70,109 @@ async def create_assessment(
     return assessment
 
 
+@router.post("/opportunities/{opportunity_id}/assess/stream")
+async def stream_assessment(
+    opportunity_id: int,
+    db: Session = Depends(get_db),
+    assessment_service: AssessmentService = Depends(get_assessment_service),
+    use_cache: bool = True,
+    force: bool = False,
+):
+    """
+    Generate a job assessment, streaming tokens and completed sections as
+    Server-Sent Events. The final "done" event carries the saved assessment.
+    """
+    opportunity = db.query(Opportunity).filter(Opportunity.id == opportunity_id).first()
+    if not opportunity:
+        raise HTTPException(status_code=404, detail="Opportunity not found")
+
+    profile = get_default_profile(db)
+    events = assessment_service.stream_assessment(
+        opportunity, profile, db, use_cache=use_cache, force=force
+    )
+
+    async def event_stream():
+        async for event in events:
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stale", response_model=List[JobAssessmentSchema])
+def get_stale_assessments(
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[int] = None,
+    db: Session = Depends(get_db),
+    assessment_service: AssessmentService = Depends(get_assessment_service),
+):
+    """
+    List assessments made from an older profile version or changed
+    opportunity. Pass the X-Next-Cursor header of a response as `cursor` to
+    continue; a page can be short (even empty) while the header is present,
+    which is absent once every assessment has been checked.
+    """
+    profile = get_default_profile(db)
+    assessments, next_cursor = assessment_service.get_stale_assessments(
+        profile, db, limit=limit, after_id=cursor
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return assessments
+
+
+@router.get("/parse-stats")
+async def get_parse_stats():
+    """Assessments parsed from structured output vs the text fallback"""
+    return AssessmentService.parse_stats()
+
+
+@router.post("/batch", response_model=BatchAssessmentJob, status_code=202)
+async def create_batch_assessment(
+    request: BatchAssessmentRequest,
+    db: Session = Depends(get_db),
+    assessment_service: AssessmentService = Depends(get_assessment_service),
+):
+    """Assess many opportunities concurrently against the current profile"""
+    if request.opportunity_ids is None and not (request.status or request.company):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide opportunity_ids or a status/company filter",
+        )
+
+    profile = get_default_profile(db)
+    job = BatchAssessmentService(assessment_service).start(request, profile, db)
+    return job.to_schema(include_items=False)
+
+
+@router.get("/batch/{job_id}", response_model=BatchAssessmentJob)
+async def get_batch_assessment(job_id: str):
+    """Get progress and per-opportunity results of a batch"""
+    job = BatchAssessmentService.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return job.to_schema()
+
+
+@router.get("/batch/{job_id}/events")
+async def stream_batch_assessment(job_id: str):
+    """Stream batch progress as Server-Sent Events until the batch is done"""
+    job = BatchAssessmentService.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    async def event_stream():
+        async for event in job.events():
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/opportunities/{opportunity_id}", response_model=JobAssessmentSchema)
 async def get_opportunity_assessment(
     opportunity_id: int,
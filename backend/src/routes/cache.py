@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+
+from api.llm_cache import get_llm_cache
+from utils.page_cache import get_page_cache
+
+router = APIRouter()
+
+
+@router.get("/stats")
+def get_cache_stats():
+    """Hit/miss counters and sizes of the page and LLM response caches"""
+    page_cache = get_page_cache()
+    llm_cache = get_llm_cache()
+    return {
+        "pages": page_cache.stats() if page_cache else None,
+        "llm": llm_cache.stats() if llm_cache else None,
+    }
+
+
+@router.delete("/pages")
+def clear_page_cache():
+    """Drop every cached page so the next import fetches it again"""
+    page_cache = get_page_cache()
+    if page_cache:
+        page_cache.clear()
+    return {"message": "Page cache cleared"}
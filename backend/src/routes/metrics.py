@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from api.llm_metrics import get_llm_metrics
+from utils.request_timing import get_request_metrics
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    """Request and LLM metrics of this process in the Prometheus text format, for scraping"""
+    return PlainTextResponse(
+        get_request_metrics().render_prometheus() + get_llm_metrics().render_prometheus(),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
+
+
+@router.get("/llm")
+def get_llm_summary(hours: float = Query(24, gt=0, le=24 * 90)):
+    """LLM calls, tokens, cost and latency over the last `hours`, per caller and model"""
+    return get_llm_metrics().summarize(hours=hours)
@@ -1,10 +1,10 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from db.session import get_db, SessionLocal
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from schemas import Opportunity as OpportunitySchema
-from schemas import OpportunityCreate
+from schemas import OpportunityCreate, OpportunityWithAssessment
 from services.opportunity_service import OpportunityService
 from services.assessment_service import AssessmentService
 from sqlalchemy.orm import Session
@@ -16,28 +16,68 @@ class LinkRequest(BaseModel):
     link: str
 
 
-@router.get("/", response_model=List[OpportunitySchema])
-def get_opportunities(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return OpportunityService.get_all(skip=skip, limit=limit, db=db)
+@router.get(
+    "/",
+    response_model=List[OpportunityWithAssessment],
+    response_model_exclude_unset=True,
+)
+def get_opportunities(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "title", "company", "min_salary", "max_salary"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    status: Optional[str] = None,
+    company: Optional[str] = None,
+    level: Optional[str] = None,
+    min_salary: Optional[int] = None,
+    max_salary: Optional[int] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    List opportunities. Pass the X-Next-Cursor header of a response as
+    `cursor` to fetch the following page; the header is absent on the last one.
+    With include=assessment each opportunity carries its fit score,
+    recommendation and assessment status, fetched in the same query.
+    """
+    includes = {part.strip() for part in include.split(",")} if include else set()
+    try:
+        opportunities, next_cursor = OpportunityService.get_all(
+            skip=skip,
+            limit=limit,
+            db=db,
+            cursor=cursor,
+            sort=sort,
+            order=order,
+            status=status,
+            company=company,
+            level=level,
+            min_salary=min_salary,
+            max_salary=max_salary,
+            include_assessment="assessment" in includes,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return opportunities
 
 
 @router.post("/", response_model=OpportunitySchema)
 async def create_opportunity(
-    opportunity: OpportunityCreate, 
-    background_tasks: BackgroundTasks,
+    opportunity: OpportunityCreate,
     db: Session = Depends(get_db)
 ):
     try:
         opp = await OpportunityService.create(opportunity, db)
-        db.commit()  # ensure opp.id is persisted
+
+        # Picked up by the assessment worker (src/worker.py); committed in the
+        # same transaction, so every opportunity has its queued assessment
+        AssessmentService.enqueue_for_opportunity(db, opp.id, kind="initial")
+        db.commit()
         db.refresh(opp)
-        
-        background_tasks.add_task(
-            AssessmentService.generate_for_opportunity,
-            db_factory=SessionLocal,
-            opportunity_id=opp.id,
-            kind="initial",
-        )
         return opp
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,21 +85,15 @@ async def create_opportunity(
 
 @router.post("/from-link", response_model=OpportunitySchema)
 async def create_opportunity_from_link(
-    link_req: LinkRequest, 
-    background_tasks: BackgroundTasks,
+    link_req: LinkRequest,
     db: Session = Depends(get_db)
 ):
     try:
         opp = await OpportunityService.create_from_link(link_req.link, db)
+
+        AssessmentService.enqueue_for_opportunity(db, opp.id, kind="initial")
         db.commit()
         db.refresh(opp)
-        
-        background_tasks.add_task(
-            AssessmentService.generate_for_opportunity,
-            db_factory=SessionLocal,
-            opportunity_id=opp.id,
-            kind="initial",
-        )
         return opp
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,6 +45,16 @@ class Opportunity(OpportunityBase):
         from_attributes = True
 
 
+class OpportunityAssessmentSummary(BaseModel):
+    fit_score: Optional[int] = None
+    recommendation: Optional[str] = None
+    status: Optional[str] = None  # Status of the queued initial assessment
+
+
+class OpportunityWithAssessment(Opportunity):
+    assessment: Optional[OpportunityAssessmentSummary] = None
+
+
 # Profile schemas
 class ProfileEntryBase(BaseModel):
     type: Literal["experience", "education", "personal"]
@@ -127,3 +137,33 @@ class JobAssessment(JobAssessmentBase):
 class JobAssessmentWithRelations(JobAssessment):
     opportunity: Optional[dict] = None
     profile: Optional[dict] = None
+
+
+# Batch assessment schemas
+class BatchAssessmentRequest(BaseModel):
+    opportunity_ids: Optional[List[int]] = None  # Explicit ids, or use the filters
+    status: Optional[str] = None
+    company: Optional[str] = None
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=50)
+    use_cache: bool = True
+    force: bool = False  # Re-assess even when fresh, skipping cached LLM answers
+
+
+class BatchAssessmentItem(BaseModel):
+    opportunity_id: int
+    status: Literal["succeeded", "failed"]
+    fit_score: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchAssessmentJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "completed"]
+    total: int
+    completed: int
+    failed: int
+    skipped: int = 0  # Fresh assessments left untouched
+    profile_id: int
+    profile_version: int
+    created_at: datetime
+    items: List[BatchAssessmentItem] = []
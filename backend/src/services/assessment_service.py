@@ -1,10 +1,13 @@
-from sqlalchemy.exc import IntegrityError
+from typing import Optional
+
 from sqlalchemy.orm import Session
 from db.session import SessionLocal
 from db.assessment_dao import AssessmentDAO
 from db.opportunity_dao import OpportunityDAO
+from models.assessment import Assessment
 from models.job_assessment import JobAssessment
 from models.profile import Profile
+from api.llm_governor import CircuitOpenError
 from api.openai_client import gpt_chat_complete
 import logging
 
@@ -13,44 +16,52 @@ logger = logging.getLogger(__name__)
 
 class AssessmentService:
     @staticmethod
-    def generate_for_opportunity(db_factory=SessionLocal, opportunity_id: int = None, kind: str = "initial") -> None:
+    def enqueue_for_opportunity(db: Session, opportunity_id: int, kind: str = "initial") -> None:
+        """
+        Queue an assessment for the worker (see worker.py). Idempotent with
+        respect to unique(opportunity_id, kind); the caller commits.
+        """
+        AssessmentDAO.enqueue(db, opportunity_id, kind)
+        logger.info(f"Queued {kind} assessment for opportunity {opportunity_id}")
+
+    @staticmethod
+    def run_claimed(
+        db_factory=SessionLocal,
+        assessment_id: int = None,
+        max_attempts: int = 1,
+        leased_by: Optional[str] = None,
+    ) -> None:
         """
-        Background-safe entrypoint. Opens its own session from db_factory.
-        1) Upsert a row with status 'pending' (respect unique(opportunity_id, kind)).
-        2) Fetch opportunity + any needed context (JD text, company, etc.).
-        3) Call LLM parser/generator as needed.
-        4) Persist summary/details and set status='succeeded' or 'failed'.
+        Worker entrypoint for an assessment leased via AssessmentDAO.claim_next.
+        Opens its own session from db_factory.
+        1) Fetch opportunity + any needed context (JD text, company, etc.).
+        2) Call LLM parser/generator as needed.
+        3) Persist summary/details and set status='succeeded'.
+        On error the lease is released for another attempt, or the row is
+        marked 'failed' once max_attempts is used up. Work turned away by the
+        open LLM circuit breaker is released without using up an attempt.
+        With leased_by (the claiming worker), results are only written while
+        that worker still holds the lease.
         """
-        if opportunity_id is None:
-            logger.error("generate_for_opportunity called without opportunity_id")
+        if assessment_id is None:
+            logger.error("run_claimed called without assessment_id")
             return
 
         try:
             with db_factory() as db:
-                # idempotency check / upsert 'pending'
-                assessment = AssessmentDAO.get_by_opportunity_and_kind(db, opportunity_id, kind)
-                if assessment and assessment.status == "succeeded":
-                    logger.info(f"Assessment already exists for opportunity {opportunity_id}, kind {kind}")
+                assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
+                if not assessment or assessment.status != "pending":
+                    logger.info(f"Assessment {assessment_id} is no longer pending, skipping")
                     return
-                    
-                if not assessment:
-                    try:
-                        assessment = AssessmentDAO.create(db, opportunity_id=opportunity_id, kind=kind, status="pending")
-                        db.commit()
-                        db.refresh(assessment)
-                        logger.info(f"Created pending assessment for opportunity {opportunity_id}")
-                    except IntegrityError:
-                        db.rollback()
-                        assessment = AssessmentDAO.get_by_opportunity_and_kind(db, opportunity_id, kind)
-                        if assessment and assessment.status == "succeeded":
-                            logger.info(f"Assessment already exists (concurrent creation) for opportunity {opportunity_id}")
-                            return
+                opportunity_id = assessment.opportunity_id
 
                 # fetch opportunity context
                 opp = OpportunityDAO.get_by_id(db, opportunity_id)
                 if not opp:
                     logger.error(f"Opportunity {opportunity_id} not found")
-                    AssessmentDAO.update_status(db, assessment.id, "failed", message="Opportunity missing")
+                    AssessmentDAO.update_status(
+                        db, assessment.id, "failed", message="Opportunity missing", leased_by=leased_by
+                    )
                     db.commit()
                     return
 
@@ -61,30 +72,52 @@ class AssessmentService:
                 # Call LLM to generate assessment summary
                 summary = AssessmentService._make_assessment(input_text)
 
-                AssessmentDAO.update_success(db, assessment.id, summary=summary)
-                
+                if not AssessmentDAO.update_success(db, assessment.id, summary=summary, leased_by=leased_by):
+                    db.rollback()
+                    logger.warning(
+                        f"Assessment {assessment_id} lease was lost to another worker, dropping result"
+                    )
+                    return
+
                 # Also create a JobAssessment for backward compatibility
                 AssessmentService._create_job_assessment(db, opp, summary)
-                
+
                 db.commit()
                 logger.info(f"Successfully generated assessment for opportunity {opportunity_id}")
-                
+
+        except CircuitOpenError as e:
+            logger.warning(f"Assessment {assessment_id} deferred: {e}")
+            try:
+                with db_factory() as db:
+                    AssessmentDAO.release(
+                        db, assessment_id, refund_attempt=True, leased_by=leased_by
+                    )
+                    db.commit()
+            except Exception:
+                logger.exception("Failed to release deferred assessment")
         except Exception as e:
-            logger.exception(f"Assessment generation failed for opportunity {opportunity_id}: {e}")
+            logger.exception(f"Assessment {assessment_id} failed: {e}")
             try:
                 with db_factory() as db:
-                    a = AssessmentDAO.get_by_opportunity_and_kind(db, opportunity_id, kind)
-                    if a:
-                        AssessmentDAO.update_status(db, a.id, "failed", message=str(e))
+                    a = db.query(Assessment).filter(Assessment.id == assessment_id).first()
+                    if a and a.status == "pending":
+                        if a.attempts >= max_attempts:
+                            AssessmentDAO.update_status(
+                                db, a.id, "failed", message=str(e), leased_by=leased_by
+                            )
+                        else:
+                            AssessmentDAO.release(db, a.id, leased_by=leased_by)
                         db.commit()
             except Exception:
                 logger.exception("Failed to record assessment failure status")
 
     @staticmethod
     def _make_assessment(input_text: str) -> str:
-        """Generate an initial assessment summary using LLM"""
-        try:
-            system_prompt = """
+        """
+        Generate an initial assessment summary using LLM. Errors propagate so
+        the job is retried instead of storing a placeholder summary.
+        """
+        system_prompt = """
 You are a career advisor analyzing job opportunities. 
 Given job posting information, provide a concise initial assessment focusing on:
 1. What makes this role appealing or concerning
@@ -94,24 +127,22 @@ Given job posting information, provide a concise initial assessment focusing on:
 
 Keep the assessment informative but concise (2-3 paragraphs maximum).
 """
-            
-            user_prompt = f"""
+        
+        user_prompt = f"""
 Analyze this job opportunity and provide an initial assessment:
 
 {input_text}
 """
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-            
-            response = gpt_chat_complete(messages=messages, model="gpt-4o-mini")
-            return response.strip()
-            
-        except Exception as e:
-            logger.warning(f"LLM assessment failed: {e}")
-            return f"Initial assessment could not be generated automatically. Manual review recommended for this opportunity. Error: {str(e)}"
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        
+        response = gpt_chat_complete(
+            messages=messages, model="gpt-4o-mini", caller="assessment_summary"
+        )
+        return response.strip()
 
     @staticmethod
     def _create_job_assessment(db: Session, opportunity, summary: str):
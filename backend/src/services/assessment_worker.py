@@ -0,0 +1,124 @@
+import logging
+import os
+import socket
+import threading
+from typing import List, Optional
+
+from api.llm_governor import get_llm_governor
+from config import settings
+from db.assessment_dao import AssessmentDAO
+from db.session import SessionLocal
+from services.assessment_service import AssessmentService
+
+logger = logging.getLogger(__name__)
+
+
+class AssessmentWorker:
+    """
+    Drains the `assessments` table as a durable job queue.
+
+    Each slot is a thread that leases one pending assessment at a time and
+    runs it through AssessmentService.run_claimed. Leases expire after
+    lease_seconds, so work held by a crashed worker is picked up again by
+    any live worker; while this worker is alive it renews the leases its
+    slots hold, and a slot only writes its result if it still holds the
+    lease. Rows that exhaust max_attempts are marked failed.
+    Slots stop claiming while the LLM circuit breaker is open.
+    """
+
+    def __init__(
+        self,
+        db_factory=SessionLocal,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.db_factory = db_factory
+        self.concurrency = concurrency or settings.ASSESSMENT_WORKER_CONCURRENCY
+        self.lease_seconds = lease_seconds or settings.ASSESSMENT_LEASE_SECONDS
+        self.poll_interval = poll_interval or settings.ASSESSMENT_POLL_INTERVAL_SECONDS
+        self.max_attempts = max_attempts or settings.ASSESSMENT_MAX_ATTEMPTS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._slot_ids = [f"{self.worker_id}:{slot}" for slot in range(self.concurrency)]
+
+    def run(self) -> None:
+        """Run until stop() is called, blocking the calling thread"""
+        logger.info(
+            f"Assessment worker {self.worker_id} starting with {self.concurrency} slots"
+        )
+        for slot, slot_id in enumerate(self._slot_ids):
+            thread = threading.Thread(
+                target=self._slot_loop,
+                args=(slot_id,),
+                name=f"assessment-worker-{slot}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        # The main thread keeps the slots' leases alive and reaps rows
+        # that ran out of attempts
+        while not self._stop.is_set():
+            self._renew_leases()
+            self._reap_exhausted()
+            self._stop.wait(self.lease_seconds / 3)
+
+        for thread in self._threads:
+            thread.join()
+        logger.info(f"Assessment worker {self.worker_id} stopped")
+
+    def stop(self) -> None:
+        """Ask all slots to exit after their current assessment"""
+        self._stop.set()
+
+    def _slot_loop(self, slot_id: str) -> None:
+        breaker = get_llm_governor().breaker
+        while not self._stop.is_set():
+            # Leave queued work alone during an LLM outage
+            paused = breaker.retry_after()
+            if paused:
+                self._stop.wait(paused)
+                continue
+
+            try:
+                with self.db_factory() as db:
+                    assessment = AssessmentDAO.claim_next(
+                        db, slot_id, self.lease_seconds, self.max_attempts
+                    )
+                    assessment_id = assessment.id if assessment else None
+            except Exception:
+                logger.exception(f"Worker slot {slot_id} failed to claim an assessment")
+                assessment_id = None
+
+            if assessment_id is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            logger.info(f"Worker slot {slot_id} claimed assessment {assessment_id}")
+            AssessmentService.run_claimed(
+                db_factory=self.db_factory,
+                assessment_id=assessment_id,
+                max_attempts=self.max_attempts,
+                leased_by=slot_id,
+            )
+
+    def _renew_leases(self) -> None:
+        try:
+            with self.db_factory() as db:
+                AssessmentDAO.renew_leases(db, self._slot_ids, self.lease_seconds)
+                db.commit()
+        except Exception:
+            logger.exception("Failed to renew assessment leases")
+
+    def _reap_exhausted(self) -> None:
+        try:
+            with self.db_factory() as db:
+                failed = AssessmentDAO.fail_exhausted(db, self.max_attempts)
+                db.commit()
+            if failed:
+                logger.warning(f"Marked {failed} exhausted assessments as failed")
+        except Exception:
+            logger.exception("Failed to reap exhausted assessments")
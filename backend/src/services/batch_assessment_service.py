@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from api.llm_governor import CircuitOpenError, get_llm_governor
+from config import settings
+from db.session import SessionLocal
+from models.job_assessment import JobAssessment
+from models.opportunity import Opportunity
+from models.profile import Profile
+from schemas import BatchAssessmentItem, BatchAssessmentRequest
+from schemas import BatchAssessmentJob as BatchAssessmentJobSchema
+from services.job_assessment_service import AssessmentService, opportunity_fingerprint
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class BatchAssessmentJob:
+    """In-memory state and progress events of one batch run"""
+
+    def __init__(
+        self,
+        opportunity_ids: List[int],
+        profile_id: int,
+        profile_version: int,
+        max_concurrency: int,
+        use_cache: bool,
+        skipped: int = 0,
+        refresh_cache: bool = False,
+    ):
+        self.id = str(uuid.uuid4())
+        self.opportunity_ids = opportunity_ids
+        self.profile_id = profile_id
+        self.profile_version = profile_version
+        self.max_concurrency = max_concurrency
+        self.use_cache = use_cache
+        # Forced runs ask the LLM again rather than replaying cached answers
+        self.refresh_cache = refresh_cache
+        self.status = "pending"
+        self.created_at = datetime.utcnow()
+        self.items: List[BatchAssessmentItem] = []
+        self.completed = 0
+        self.failed = 0
+        self.skipped = skipped
+        self._events: List[Dict[str, Any]] = []
+        self._changed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status == "completed"
+
+    def to_schema(self, include_items: bool = True) -> BatchAssessmentJobSchema:
+        return BatchAssessmentJobSchema(
+            id=self.id,
+            status=self.status,
+            total=len(self.opportunity_ids),
+            completed=self.completed,
+            failed=self.failed,
+            skipped=self.skipped,
+            profile_id=self.profile_id,
+            profile_version=self.profile_version,
+            created_at=self.created_at,
+            items=list(self.items) if include_items else [],
+        )
+
+    async def record(self, item: BatchAssessmentItem) -> None:
+        self.items.append(item)
+        if item.status == "succeeded":
+            self.completed += 1
+        else:
+            self.failed += 1
+        await self._publish(
+            {
+                "type": "progress",
+                **item.model_dump(),
+                "completed": self.completed,
+                "failed": self.failed,
+                "total": len(self.opportunity_ids),
+            }
+        )
+
+    async def finish(self) -> None:
+        self.status = "completed"
+        await self._publish(
+            {"type": "done", **self.to_schema(include_items=False).model_dump(mode="json")}
+        )
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every progress event, from the first, until the job is done"""
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self._events) > index)
+                pending = self._events[index:]
+            for event in pending:
+                index += 1
+                yield event
+                if event["type"] == "done":
+                    return
+
+    async def _publish(self, event: Dict[str, Any]) -> None:
+        async with self._changed:
+            self._events.append(event)
+            self._changed.notify_all()
+
+
+class BatchAssessmentService:
+    """
+    Runs assessments for many opportunities against one profile snapshot.
+
+    Prompts are built up front from a single rendering of the profile, then
+    sent concurrently with at most max_concurrency requests in flight. Jobs
+    live in the web process; the most recent MAX_RETAINED_JOBS are kept for
+    status queries.
+    """
+
+    MAX_RETAINED_JOBS = 100
+    _jobs: "OrderedDict[str, BatchAssessmentJob]" = OrderedDict()
+
+    def __init__(self, assessment_service: AssessmentService, db_factory=SessionLocal):
+        self.assessment_service = assessment_service
+        self.db_factory = db_factory
+
+    def start(
+        self, request: BatchAssessmentRequest, profile: Profile, db: Session
+    ) -> BatchAssessmentJob:
+        """
+        Select the opportunities, build their prompts and start the run.
+        Opportunities whose stored assessment is still fresh are skipped
+        unless request.force is set, which also skips cached LLM responses.
+        """
+        opportunities = self._select_opportunities(request, db)
+        if not request.force:
+            existing = {
+                assessment.opportunity_id: assessment
+                for assessment in db.query(JobAssessment).filter(
+                    JobAssessment.opportunity_id.in_([o.id for o in opportunities])
+                )
+            }
+            stale = [
+                opportunity
+                for opportunity in opportunities
+                if opportunity.id not in existing
+                or not AssessmentService.is_fresh(
+                    existing[opportunity.id], opportunity, profile
+                )
+            ]
+        else:
+            stale = opportunities
+
+        profile_text = self.assessment_service._format_profile(profile)
+        prompts = [
+            (
+                opportunity.id,
+                opportunity_fingerprint(opportunity),
+                self.assessment_service._build_assessment_prompt(
+                    opportunity, profile, profile_text=profile_text
+                ),
+            )
+            for opportunity in stale
+        ]
+
+        job = BatchAssessmentJob(
+            opportunity_ids=[opportunity_id for opportunity_id, _, _ in prompts],
+            profile_id=profile.id,
+            profile_version=profile.version,
+            max_concurrency=request.max_concurrency
+            or settings.BATCH_ASSESSMENT_MAX_CONCURRENCY,
+            use_cache=request.use_cache,
+            skipped=len(opportunities) - len(stale),
+            refresh_cache=request.force,
+        )
+        self._remember(job)
+        job._task = asyncio.create_task(self._run(job, prompts))
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[BatchAssessmentJob]:
+        return cls._jobs.get(job_id)
+
+    async def _run(
+        self, job: BatchAssessmentJob, prompts: List[Tuple[int, str, str]]
+    ) -> None:
+        job.status = "running"
+        semaphore = asyncio.Semaphore(job.max_concurrency)
+        logger.info(
+            f"Batch {job.id}: assessing {len(prompts)} opportunities, "
+            f"{job.max_concurrency} in flight"
+        )
+
+        with self.db_factory() as db:
+
+            async def assess_one(opportunity_id: int, fingerprint: str, prompt: str) -> None:
+                try:
+                    async with semaphore:
+                        assessment_data = await self._request_when_available(
+                            prompt, job.use_cache, job.refresh_cache
+                        )
+                    assessment = self.assessment_service.save_assessment(
+                        db,
+                        opportunity_id,
+                        job.profile_id,
+                        job.profile_version,
+                        assessment_data,
+                        fingerprint,
+                    )
+                    item = BatchAssessmentItem(
+                        opportunity_id=opportunity_id,
+                        status="succeeded",
+                        fit_score=assessment.fit_score,
+                    )
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Batch {job.id}: opportunity {opportunity_id} failed: {e}")
+                    item = BatchAssessmentItem(
+                        opportunity_id=opportunity_id, status="failed", error=str(e)
+                    )
+                await job.record(item)
+
+            await asyncio.gather(
+                *(assess_one(*prompt) for prompt in prompts)
+            )
+
+        await job.finish()
+        logger.info(
+            f"Batch {job.id} finished: {job.completed} succeeded, {job.failed} failed"
+        )
+
+    async def _request_when_available(
+        self, prompt: str, use_cache: bool, refresh_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Request an assessment, waiting out any period the LLM circuit breaker is open"""
+        breaker = get_llm_governor().breaker
+        while True:
+            await asyncio.sleep(breaker.retry_after())
+            try:
+                return await self.assessment_service.request_assessment_async(
+                    prompt, use_cache=use_cache, refresh_cache=refresh_cache
+                )
+            except CircuitOpenError as e:
+                await asyncio.sleep(e.retry_after)
+
+    @staticmethod
+    def _select_opportunities(request: BatchAssessmentRequest, db: Session) -> List[Opportunity]:
+        query = db.query(Opportunity)
+        if request.opportunity_ids is not None:
+            query = query.filter(Opportunity.id.in_(request.opportunity_ids))
+        if request.status:
+            query = query.filter(Opportunity.status == request.status)
+        if request.company:
+            query = query.filter(Opportunity.company == request.company)
+        return query.order_by(Opportunity.id).all()
+
+    @classmethod
+    def _remember(cls, job: BatchAssessmentJob) -> None:
+        cls._jobs[job.id] = job
+        while len(cls._jobs) > cls.MAX_RETAINED_JOBS:
+            cls._jobs.popitem(last=False)
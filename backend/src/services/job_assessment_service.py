@@ -1,97 +1,532 @@
+import hashlib
+import json
+import logging
 import re
-from typing import Any, Dict, Optional
-
-import openai
-from config import settings
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from api.openai_client import (
+    create_chat_completion,
+    create_chat_completion_async,
+    stream_chat_completion_async,
+)
+from db.session import SessionLocal
+from llm.tools import assessment_create
 from models.job_assessment import JobAssessment
 from models.opportunity import Opportunity
 from models.profile import Profile
+from pydantic import ValidationError
+from schemas import JobAssessment as JobAssessmentSchema
+from schemas import JobAssessmentBase
+from sqlalchemy import case, or_
 from sqlalchemy.orm import Session
 
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = "You are an expert career counselor and recruiter. Provide honest, actionable job fit assessments."
+
+FALLBACK_ASSESSMENT = {
+    "summary": "Assessment could not be generated automatically. Manual review recommended.",
+    "score": 4,
+    "recommendation": "Review this opportunity manually to determine fit.",
+}
+
+
+class AssessmentParseError(ValueError):
+    """The completion held neither a valid assessment tool call nor any text"""
+
+
+def opportunity_fingerprint(opportunity: Opportunity) -> str:
+    """Hash of the opportunity fields that feed the assessment prompt"""
+    fields = [
+        opportunity.title,
+        opportunity.company,
+        opportunity.level,
+        opportunity.min_salary,
+        opportunity.max_salary,
+    ]
+    return hashlib.sha256(json.dumps(fields, default=str).encode("utf-8")).hexdigest()
+
+
+# Counts of structured vs fallback parses since the process started
+_parse_stats = {"structured": 0, "fallback": 0}
+_parse_stats_lock = threading.Lock()
+
+
+def _record_parse(kind: str) -> None:
+    with _parse_stats_lock:
+        _parse_stats[kind] += 1
+
+
+class AssessmentStreamParser:
+    """
+    Picks sections out of an assessment while it streams in. feed() returns
+    the sections the new text completed: the summary once FIT SCORE starts,
+    the score once its digits end. finish() parses the whole response the
+    same way as a non-streamed one and returns the sections still missing.
+    """
+
+    SUMMARY_PATTERN = re.compile(
+        r"SUMMARY OF FIT:\s*(.+?)(?=FIT SCORE:)", re.DOTALL | re.IGNORECASE
+    )
+    SCORE_PATTERN = re.compile(r"FIT SCORE:\s*(\d+)\D", re.IGNORECASE)
+
+    def __init__(self):
+        self.text = ""
+        self.sections: Dict[str, Any] = {}
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        self.text += delta
+        completed = []
+        if "summary" not in self.sections:
+            match = self.SUMMARY_PATTERN.search(self.text)
+            if match:
+                completed.append(("summary", match.group(1).strip()))
+        if "score" not in self.sections:
+            match = self.SCORE_PATTERN.search(self.text)
+            if match:
+                completed.append(("score", max(1, min(7, int(match.group(1))))))
+        self.sections.update(completed)
+        return completed
+
+    def finish(self, assessment_data: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """Record the final parse; returns the sections not emitted yet"""
+        remaining = [
+            (name, value)
+            for name, value in assessment_data.items()
+            if name not in self.sections
+        ]
+        self.sections.update(assessment_data)
+        return remaining
+
 
 class AssessmentService:
     def __init__(self, openai_client=None):
-        self.client = openai_client or openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        # None uses the process-wide client from api.openai_client
+        self.client = openai_client
 
     def assess_opportunity(
-        self, opportunity: Opportunity, profile: Profile, db: Session
+        self,
+        opportunity: Opportunity,
+        profile: Profile,
+        db: Session,
+        use_cache: bool = True,
+        force: bool = False,
     ) -> JobAssessment:
-        """Generate AI assessment of opportunity fit for profile"""
+        """
+        Generate AI assessment of opportunity fit for profile.
+
+        The stored assessment is returned as-is while it is fresh (same
+        profile version and opportunity fields); force=True re-assesses
+        anyway, and then asks the LLM again instead of reading its response
+        cache. Identical prompts are answered from that cache unless
+        use_cache is False.
+        """
 
         # Check if assessment already exists for this opportunity
-        existing = (
-            db.query(JobAssessment)
-            .filter(JobAssessment.opportunity_id == opportunity.id)
-            .first()
-        )
+        existing = self.get_assessment_for_opportunity(opportunity.id, db)
+        if existing and not force and self.is_fresh(existing, opportunity, profile):
+            return existing
 
         # Generate new assessment
         prompt = self._build_assessment_prompt(opportunity, profile)
+        fingerprint = opportunity_fingerprint(opportunity)
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Use cost-effective model
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert career counselor and recruiter. Provide honest, actionable job fit assessments.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.1,
-                max_tokens=500,
+            response = create_chat_completion(
+                self._request_params(prompt),
+                client=self.client,
+                use_cache=use_cache,
+                caller="assessment",
+                validate=self._check_completion,
+                refresh_cache=force,
             )
+            assessment_data = self._parse_completion(response.choices[0].message)
+        except Exception as e:
+            return self._fallback_assessment(db, existing, opportunity, profile, e)
+
+        return self._apply_assessment(
+            db,
+            existing,
+            opportunity.id,
+            profile.id,
+            profile.version,
+            assessment_data,
+            fingerprint,
+        )
 
-            assessment_data = self._parse_assessment_response(
-                response.choices[0].message.content
-            )
+    async def assess_opportunity_async(
+        self,
+        opportunity: Opportunity,
+        profile: Profile,
+        db: Session,
+        use_cache: bool = True,
+        force: bool = False,
+    ) -> JobAssessment:
+        """
+        Async variant of assess_opportunity for event-loop code. The LLM call
+        goes through the shared async client, so rate-limit waits and retry
+        backoff do not block the loop.
+        """
+        existing = self.get_assessment_for_opportunity(opportunity.id, db)
+        if existing and not force and self.is_fresh(existing, opportunity, profile):
+            return existing
 
-            if existing:
-                # Update existing assessment
-                existing.profile_id = profile.id
-                existing.profile_version = profile.version
-                existing.summary_of_fit = assessment_data["summary"]
-                existing.fit_score = assessment_data["score"]
-                existing.recommendation = assessment_data["recommendation"]
-                # updated_at will be automatically set by SQLAlchemy
-                db.commit()
-                db.refresh(existing)
-                return existing
-            else:
-                # Create new assessment
-                assessment = JobAssessment(
-                    opportunity_id=opportunity.id,
-                    profile_id=profile.id,
-                    profile_version=profile.version,
-                    summary_of_fit=assessment_data["summary"],
-                    fit_score=assessment_data["score"],
-                    recommendation=assessment_data["recommendation"],
-                )
-                return assessment
+        prompt = self._build_assessment_prompt(opportunity, profile)
+        fingerprint = opportunity_fingerprint(opportunity)
 
+        try:
+            response = await create_chat_completion_async(
+                self._request_params(prompt),
+                use_cache=use_cache,
+                caller="assessment",
+                validate=self._check_completion,
+                refresh_cache=force,
+            )
+            assessment_data = self._parse_completion(response.choices[0].message)
         except Exception as e:
-            # Fallback assessment if AI fails
-            fallback_assessment = JobAssessment(
-                opportunity_id=opportunity.id,
-                profile_id=profile.id,
-                profile_version=profile.version,
-                summary_of_fit="Assessment could not be generated automatically. Manual review recommended.",
-                fit_score=4,
-                recommendation="Review this opportunity manually to determine fit.",
+            return self._fallback_assessment(db, existing, opportunity, profile, e)
+
+        return self._apply_assessment(
+            db,
+            existing,
+            opportunity.id,
+            profile.id,
+            profile.version,
+            assessment_data,
+            fingerprint,
+        )
+
+    def _fallback_assessment(
+        self,
+        db: Session,
+        existing: Optional[JobAssessment],
+        opportunity: Opportunity,
+        profile: Profile,
+        error: Exception,
+    ) -> JobAssessment:
+        logger.warning(f"Assessment of opportunity {opportunity.id} failed: {error}")
+        # Keep a real assessment over a placeholder when the LLM is failing
+        if existing and existing.opportunity_fingerprint is not None:
+            return existing
+        # Fallback assessment if AI fails; no fingerprint keeps it stale
+        return self._apply_assessment(
+            db,
+            existing,
+            opportunity.id,
+            profile.id,
+            profile.version,
+            dict(FALLBACK_ASSESSMENT),
+            None,
+        )
+
+    @staticmethod
+    def is_fresh(
+        assessment: JobAssessment, opportunity: Opportunity, profile: Profile
+    ) -> bool:
+        """True if the assessment was produced from this profile version and opportunity"""
+        return (
+            assessment.opportunity_fingerprint is not None
+            and assessment.profile_id == profile.id
+            and assessment.profile_version == profile.version
+            and assessment.opportunity_fingerprint == opportunity_fingerprint(opportunity)
+        )
+
+    def get_stale_assessments(
+        self,
+        profile: Profile,
+        db: Session,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        scan_batch: int = 1000,
+    ) -> Tuple[List[JobAssessment], Optional[int]]:
+        """
+        Stored assessments that no longer match the profile or their
+        opportunity, in id order after after_id, with the cursor (last id
+        scanned) for the next page, or None once every row has been seen.
+
+        A different profile or version, or a missing fingerprint, is decided
+        in SQL; only the remaining rows have their opportunity fingerprint
+        recomputed, from the few columns it covers. A page scans at most
+        `scan_batch` rows, so it can hold fewer than `limit` assessments
+        while a cursor is still returned.
+        """
+        stale_in_sql = or_(
+            JobAssessment.profile_id != profile.id,
+            JobAssessment.profile_version != profile.version,
+            JobAssessment.opportunity_fingerprint.is_(None),
+        )
+        query = (
+            db.query(
+                JobAssessment.id,
+                case((stale_in_sql, True), else_=False).label("stale"),
+                JobAssessment.opportunity_fingerprint,
+                Opportunity.title,
+                Opportunity.company,
+                Opportunity.level,
+                Opportunity.min_salary,
+                Opportunity.max_salary,
+            )
+            .join(Opportunity, Opportunity.id == JobAssessment.opportunity_id)
+            .order_by(JobAssessment.id)
+        )
+        stale_ids: List[int] = []
+        scanned = 0
+        last_id = after_id
+        exhausted = False
+        while len(stale_ids) < limit and scanned < scan_batch:
+            rows = query.filter(JobAssessment.id > (last_id or 0)).limit(
+                min(limit * 4, scan_batch - scanned)
+            ).all()
+            if not rows:
+                exhausted = True
+                break
+            for row in rows:
+                scanned += 1
+                last_id = row.id
+                # The row carries the fingerprinted opportunity fields under their own names
+                if row.stale or row.opportunity_fingerprint != opportunity_fingerprint(row):
+                    stale_ids.append(row.id)
+                    if len(stale_ids) == limit:
+                        break
+
+        assessments = (
+            db.query(JobAssessment)
+            .filter(JobAssessment.id.in_(stale_ids))
+            .order_by(JobAssessment.id)
+            .all()
+            if stale_ids
+            else []
+        )
+        if exhausted or not query.filter(JobAssessment.id > (last_id or 0)).limit(1).first():
+            return assessments, None
+        return assessments, last_id
+
+    async def request_assessment_async(
+        self, prompt: str, use_cache: bool = True, refresh_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run one assessment prompt on the shared async client and parse it.
+        Unlike assess_opportunity, LLM errors propagate to the caller.
+        refresh_cache skips the cached response but stores the new one.
+        """
+        response = await create_chat_completion_async(
+            self._request_params(prompt),
+            use_cache=use_cache,
+            caller="batch_assessment",
+            validate=self._check_completion,
+            refresh_cache=refresh_cache,
+        )
+        return self._parse_completion(response.choices[0].message)
+
+    def stream_assessment(
+        self,
+        opportunity: Opportunity,
+        profile: Profile,
+        db: Session,
+        use_cache: bool = True,
+        force: bool = False,
+        db_factory=SessionLocal,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Assess an opportunity with a streamed completion, as an async iterator
+        of events: "token" for each text delta, "section" as the summary,
+        score and recommendation complete, then "done" with the saved
+        assessment, or "error". A fresh stored assessment is sent as "done"
+        straight away unless force is set, which also skips the LLM
+        response cache.
+
+        Everything needed from db is read here, before streaming starts;
+        the result is saved in a session from db_factory, since the request
+        session may be closed by the time the stream ends.
+        """
+        existing = self.get_assessment_for_opportunity(opportunity.id, db)
+        if existing and not force and self.is_fresh(existing, opportunity, profile):
+            done = {
+                "type": "done",
+                "cached": True,
+                "assessment": JobAssessmentSchema.model_validate(existing).model_dump(
+                    mode="json"
+                ),
+            }
+
+            async def fresh_events() -> AsyncIterator[Dict[str, Any]]:
+                yield done
+
+            return fresh_events()
+
+        # Streams plain text, so the sections can be shown as they arrive
+        params = self._request_params(
+            self._build_assessment_prompt(opportunity, profile), structured=False
+        )
+        opportunity_id = opportunity.id
+        profile_id = profile.id
+        profile_version = profile.version
+        fingerprint = opportunity_fingerprint(opportunity)
+
+        async def events() -> AsyncIterator[Dict[str, Any]]:
+            parser = AssessmentStreamParser()
+            try:
+                async for delta in stream_chat_completion_async(
+                    params,
+                    use_cache=use_cache,
+                    caller="assessment_stream",
+                    refresh_cache=force,
+                ):
+                    yield {"type": "token", "delta": delta}
+                    for name, value in parser.feed(delta):
+                        yield {"type": "section", "name": name, "value": value}
+
+                assessment_data = self._parse_assessment_response(parser.text)
+                for name, value in parser.finish(assessment_data):
+                    yield {"type": "section", "name": name, "value": value}
+
+                with db_factory() as session:
+                    assessment = self.save_assessment(
+                        session,
+                        opportunity_id,
+                        profile_id,
+                        profile_version,
+                        assessment_data,
+                        fingerprint,
+                    )
+                    payload = JobAssessmentSchema.model_validate(assessment).model_dump(
+                        mode="json"
+                    )
+            except Exception as e:
+                yield {"type": "error", "detail": str(e)}
+                return
+            yield {"type": "done", "cached": False, "assessment": payload}
+
+        return events()
+
+    def save_assessment(
+        self,
+        db: Session,
+        opportunity_id: int,
+        profile_id: int,
+        profile_version: int,
+        assessment_data: Dict[str, Any],
+        fingerprint: Optional[str],
+    ) -> JobAssessment:
+        """Create or update the stored assessment for an opportunity and commit it"""
+        existing = self.get_assessment_for_opportunity(opportunity_id, db)
+        assessment = self._apply_assessment(
+            db,
+            existing,
+            opportunity_id,
+            profile_id,
+            profile_version,
+            assessment_data,
+            fingerprint,
+        )
+        if existing is None:
+            db.add(assessment)
+            db.commit()
+            db.refresh(assessment)
+        return assessment
+
+    def _apply_assessment(
+        self,
+        db: Session,
+        existing: Optional[JobAssessment],
+        opportunity_id: int,
+        profile_id: int,
+        profile_version: int,
+        assessment_data: Dict[str, Any],
+        fingerprint: Optional[str],
+    ) -> JobAssessment:
+        if existing:
+            # Update existing assessment
+            existing.profile_id = profile_id
+            existing.profile_version = profile_version
+            existing.opportunity_fingerprint = fingerprint
+            existing.summary_of_fit = assessment_data["summary"]
+            existing.fit_score = assessment_data["score"]
+            existing.recommendation = assessment_data["recommendation"]
+            # updated_at will be automatically set by SQLAlchemy
+            db.commit()
+            db.refresh(existing)
+            return existing
+
+        # Create new assessment; the caller adds and commits it
+        return JobAssessment(
+            opportunity_id=opportunity_id,
+            profile_id=profile_id,
+            profile_version=profile_version,
+            opportunity_fingerprint=fingerprint,
+            summary_of_fit=assessment_data["summary"],
+            fit_score=assessment_data["score"],
+            recommendation=assessment_data["recommendation"],
+        )
+
+    def _request_params(self, prompt: str, structured: bool = True) -> Dict[str, Any]:
+        """
+        Chat completion arguments for an assessment prompt. Structured
+        requests force an assessment_create tool call, whose arguments are
+        validated against JobAssessmentBase instead of parsed from text.
+        """
+        params = {
+            "model": "gpt-4o-mini",  # Use cost-effective model
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.1,
+            "max_tokens": 500,
+        }
+        if structured:
+            params["tools"] = assessment_create
+            params["tool_choice"] = {
+                "type": "function",
+                "function": {"name": "assessment_create"},
+            }
+        return params
+
+    def _parse_completion(self, message, record: bool = True) -> Dict[str, Any]:
+        """
+        Assessment fields from a completion message: the validated tool call
+        arguments, or, if the model answered in text, the regex parse of its
+        text. Raises AssessmentParseError when there is neither, e.g. a
+        forced tool call whose arguments do not validate, so the caller
+        stores a stale placeholder rather than a made-up score.
+        """
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            try:
+                assessment = JobAssessmentBase.model_validate_json(
+                    tool_calls[0].function.arguments
+                )
+                if record:
+                    _record_parse("structured")
+                return {
+                    "summary": assessment.summary_of_fit,
+                    "score": assessment.fit_score,
+                    "recommendation": assessment.recommendation,
+                }
+            except ValidationError as e:
+                if record:
+                    logger.warning(f"Structured assessment failed validation: {e}")
+
+        content = (message.content or "").strip()
+        if not content:
+            raise AssessmentParseError(
+                "Completion has no valid assessment tool call and no text"
             )
+        if record:
+            _record_parse("fallback")
+        return self._parse_assessment_response(content)
 
-            if existing:
-                # Update existing assessment with fallback
-                existing.profile_id = profile.id
-                existing.profile_version = profile.version
-                existing.summary_of_fit = fallback_assessment.summary_of_fit
-                existing.fit_score = fallback_assessment.fit_score
-                existing.recommendation = fallback_assessment.recommendation
-                db.commit()
-                db.refresh(existing)
-                return existing
-            else:
-                return fallback_assessment
+    def _check_completion(self, response) -> None:
+        """Raise unless the response parses, so unusable responses are not cached"""
+        self._parse_completion(response.choices[0].message, record=False)
+
+    @staticmethod
+    def parse_stats() -> Dict[str, int]:
+        """How many assessments were read from tool calls vs the regex fallback"""
+        with _parse_stats_lock:
+            return dict(_parse_stats)
 
     def get_assessment_for_opportunity(
         self, opportunity_id: int, db: Session
@@ -104,9 +539,43 @@ class AssessmentService:
         )
 
     def _build_assessment_prompt(
-        self, opportunity: Opportunity, profile: Profile
+        self,
+        opportunity: Opportunity,
+        profile: Profile,
+        profile_text: Optional[str] = None,
     ) -> str:
-        # Extract profile data from JSON entries
+        """
+        Build the assessment prompt. Pass profile_text from _format_profile
+        to reuse one profile snapshot across many opportunities.
+        """
+        if profile_text is None:
+            profile_text = self._format_profile(profile)
+
+        return f"""
+Assess job fit for this opportunity and candidate profile:
+
+OPPORTUNITY:
+Title: {opportunity.title}
+Company: {opportunity.company}
+Level: {opportunity.level or "Not specified"}
+Salary Range: {opportunity.min_salary or "Not specified"} - {opportunity.max_salary or "Not specified"}
+
+{profile_text}
+
+Provide assessment in this EXACT format:
+
+SUMMARY OF FIT:
+[2-3 sentences on how well the role matches skills, experience, and career goals. Highlight key strengths and any potential gaps.]
+
+FIT SCORE: [Single integer 1-7 where 1=poor fit, 7=excellent fit]
+
+RECOMMENDATION:
+[1-2 sentences with actionable recommendation like "Strong candidate - prioritize application" or "Consider if no better options available"]
+        """
+
+    def _format_profile(self, profile: Profile) -> str:
+        """Render the CANDIDATE PROFILE section of the assessment prompt"""
+        # Extract profile data from profile entries
         entries = profile.get_entries()
 
         # Organize profile data by type
@@ -159,16 +628,7 @@ class AssessmentService:
             notes = personal.get("key_notes", [])
             personal_text = " ".join(notes)
 
-        return f"""
-Assess job fit for this opportunity and candidate profile:
-
-OPPORTUNITY:
-Title: {opportunity.title}
-Company: {opportunity.company}
-Level: {opportunity.level or "Not specified"}
-Salary Range: {opportunity.min_salary or "Not specified"} - {opportunity.max_salary or "Not specified"}
-
-CANDIDATE PROFILE:
+        return f"""CANDIDATE PROFILE:
 Personal Summary: {personal_text}
 
 Experience:
@@ -177,18 +637,7 @@ Experience:
 Skills: {skills_text}
 
 Education:
-{education_text}
-
-Provide assessment in this EXACT format:
-
-SUMMARY OF FIT:
-[2-3 sentences on how well the role matches skills, experience, and career goals. Highlight key strengths and any potential gaps.]
-
-FIT SCORE: [Single integer 1-7 where 1=poor fit, 7=excellent fit]
-
-RECOMMENDATION:
-[1-2 sentences with actionable recommendation like "Strong candidate - prioritize application" or "Consider if no better options available"]
-        """
+{education_text}"""
 
     def _parse_assessment_response(self, response: str) -> Dict[str, Any]:
         """Parse structured AI response into components"""
@@ -222,6 +671,6 @@ RECOMMENDATION:
                 recommendation = rec_match.group(1).strip()
 
         except Exception as e:
-            print(f"Error parsing assessment response: {e}")
+            logger.warning(f"Error parsing assessment response: {e}")
 
         return {"summary": summary, "score": score, "recommendation": recommendation}
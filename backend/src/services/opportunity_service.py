@@ -1,17 +1,42 @@
-from typing import List
+from typing import List, Optional, Tuple, Union
 
 from db.opportunity_dao import create_opportunity, delete_opportunity, get_opportunities
 from llm.job_description_parser import parse_opportunity_from_link_async
 from models.opportunity import ALLOWED_STATUSES, Opportunity
 from schemas import Opportunity as OpportunitySchema
-from schemas import OpportunityCreate
+from schemas import OpportunityAssessmentSummary, OpportunityCreate, OpportunityWithAssessment
 from sqlalchemy.orm import Session
 
 
 class OpportunityService:
     @staticmethod
-    def get_all(skip: int, limit: int, db: Session) -> List[Opportunity]:
-        return get_opportunities(db, skip=skip, limit=limit)
+    def get_all(
+        skip: int, limit: int, db: Session, include_assessment: bool = False, **filters
+    ) -> Tuple[List[Union[Opportunity, OpportunityWithAssessment]], Optional[str]]:
+        """
+        Return a page of opportunities and the cursor of the next page,
+        optionally with their assessment summaries embedded.
+        """
+        rows, next_cursor = get_opportunities(
+            db, skip=skip, limit=limit, include_assessment=include_assessment, **filters
+        )
+        if not include_assessment:
+            return rows, next_cursor
+
+        opportunities = []
+        for opportunity, fit_score, recommendation, assessment_status in rows:
+            item = OpportunityWithAssessment.model_validate(opportunity)
+            item.assessment = (
+                OpportunityAssessmentSummary(
+                    fit_score=fit_score,
+                    recommendation=recommendation,
+                    status=assessment_status,
+                )
+                if fit_score is not None or assessment_status is not None
+                else None
+            )
+            opportunities.append(item)
+        return opportunities, next_cursor
 
     @staticmethod
     async def create(opportunity: OpportunityCreate, db: Session) -> Opportunity:
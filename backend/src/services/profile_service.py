@@ -1,14 +1,25 @@
 from db.profile_dao import ProfileDAO
 from schemas import ProfileEntryCreate, ProfileEntry, ProfileResponse, ProfileGenerationResponse, SourceContent
 from utils.web_scraping import fetch_and_extract_text
-from utils.file_text_extractor import extract_text_from_pdf_bytes, extract_text_from_txt_bytes
+from utils.file_text_extractor import extract_text_from_file
+from utils.process_pool import run_in_process
 from llm.generate_new_experience_profile import generate_new_experience_profile
 from db.session import get_db
-from typing import List, Optional
+from config import settings
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
 from fastapi import Depends, UploadFile
 from sqlalchemy.orm import Session
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
 import uuid
 
+logger = logging.getLogger(__name__)
+
 class ProfileService:
     def __init__(self, db: Session):
         self.dao = ProfileDAO(db)
@@ -32,51 +43,22 @@ class ProfileService:
     
     async def generate_new_profile(self, files: List[UploadFile], links: List[str], description: Optional[str] = None, user_id: str = "default") -> ProfileGenerationResponse:
         """Generate a new profile based on uploaded files and links"""
-        extracted_contents = []
-        
-        # Process links to extract content
-        for link in links:
-            try:
-                content = await fetch_and_extract_text(link)
-                extracted_contents.append(SourceContent(source=link, content=content))
-                print(f"Successfully extracted content from link: {link}")
-            except Exception as e:
-                print(f"Failed to extract content from {link}: {e}")
-
-        # Process uploaded files
-        for file in files:
-            try:
-                # Read file bytes
-                file_bytes = file.file.read()
-                file.file.seek(0)  # Reset file pointer for potential future reads
-                
-                # Determine file type and extract content
-                content = ""
-                if file.filename.lower().endswith('.pdf'):
-                    content = extract_text_from_pdf_bytes(file_bytes)
-                elif file.filename.lower().endswith('.txt'):
-                    content = extract_text_from_txt_bytes(file_bytes)
-                else:
-                    print(f"Unsupported file type: {file.filename}")
-                    continue
-                
-                if content.strip():
-                    extracted_contents.append(SourceContent(source=file.filename, content=content))
-                    print(f"Successfully extracted content from file: {file.filename}")
-                else:
-                    print(f"No content extracted from file: {file.filename}")
-                    
-            except Exception as e:
-                print(f"Failed to process file {file.filename}: {e}")
+        # Links and files are independent, so extract both at once
+        link_contents, file_contents = await asyncio.gather(
+            self._fetch_links(links), self._extract_files(files)
+        )
+        extracted_contents = link_contents + file_contents
 
         # Add description if provided
         if description:
             extracted_contents.append(SourceContent(source="description", content=description))
         
         # Generate new profile entries
-        generated_profile_response = generate_new_experience_profile(extracted_contents)
-
-        print(generated_profile_response)
+        generated_profile_response = await generate_new_experience_profile(extracted_contents)
+        logger.info(
+            f"Generated {len(generated_profile_response.entries)} profile entries "
+            f"from {len(extracted_contents)} sources"
+        )
         
         # Only proceed if we have successfully generated entries
         if not generated_profile_response.entries:
@@ -109,12 +91,97 @@ class ProfileService:
             )
             
         except Exception as e:
-            print(f"Error saving generated profile: {e}")
+            logger.exception(f"Error saving generated profile: {e}")
             return ProfileGenerationResponse(
                 message=f"Generated {len(generated_profile_response.entries)} entries but failed to save them. No changes made to existing profile.",
                 entries=[]
             )
 
+    async def _fetch_links(self, links: List[str]) -> List[SourceContent]:
+        """
+        Fetch all links concurrently, at most PROFILE_LINK_FETCH_PER_HOST at a
+        time per host. Links still running when PROFILE_LINK_FETCH_TIMEOUT_SECONDS
+        elapses are cancelled and skipped. Results keep the order of the links.
+        """
+        if not links:
+            return []
+
+        host_limits: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(settings.PROFILE_LINK_FETCH_PER_HOST)
+        )
+
+        async def fetch(link: str) -> str:
+            async with host_limits[urlparse(link).netloc.lower()]:
+                return await fetch_and_extract_text(link)
+
+        tasks = [asyncio.create_task(fetch(link)) for link in links]
+        done, pending = await asyncio.wait(
+            tasks, timeout=settings.PROFILE_LINK_FETCH_TIMEOUT_SECONDS
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        contents = []
+        for link, task in zip(links, tasks):
+            if task in pending:
+                logger.warning(f"Timed out extracting content from {link}")
+            elif task.exception() is not None:
+                logger.warning(f"Failed to extract content from {link}: {task.exception()}")
+            else:
+                contents.append(SourceContent(source=link, content=task.result()))
+                logger.debug(f"Extracted content from link: {link}")
+        return contents
+
+    async def _extract_files(self, files: List[UploadFile]) -> List[SourceContent]:
+        """
+        Extract text from the uploaded files in the shared process pool, so
+        PDF parsing runs in parallel and off the event loop. Each upload is
+        copied to a temp file that the worker reads page by page, stopping at
+        FILE_EXTRACT_MAX_PAGES pages or FILE_EXTRACT_MAX_CHARS characters.
+        """
+
+        async def extract(file: UploadFile) -> Optional[SourceContent]:
+            if not file.filename.lower().endswith(('.pdf', '.txt')):
+                logger.warning(f"Unsupported file type: {file.filename}")
+                return None
+            path = None
+            try:
+                path = await asyncio.to_thread(self._spool_to_disk, file)
+                content = await run_in_process(
+                    extract_text_from_file,
+                    path,
+                    file.filename,
+                    settings.FILE_EXTRACT_MAX_PAGES or None,
+                    settings.FILE_EXTRACT_MAX_CHARS or None,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to process file {file.filename}: {e}")
+                return None
+            finally:
+                if path is not None:
+                    os.unlink(path)
+
+            if not content.strip():
+                logger.warning(f"No content extracted from file: {file.filename}")
+                return None
+            logger.debug(f"Extracted content from file: {file.filename}")
+            return SourceContent(source=file.filename, content=content)
+
+        results = await asyncio.gather(*(extract(file) for file in files))
+        return [content for content in results if content is not None]
+
+    @staticmethod
+    def _spool_to_disk(file: UploadFile) -> str:
+        """Copy an upload to a named temp file the extraction process can open"""
+        suffix = os.path.splitext(file.filename)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as out:
+            file.file.seek(0)
+            shutil.copyfileobj(file.file, out)
+        file.file.seek(0)  # Reset file pointer for potential future reads
+        return out.name
+
 def get_profile_service(db: Session = Depends(get_db)) -> ProfileService:
     """Dependency to get profile service"""
     return ProfileService(db) 
\ No newline at end of file
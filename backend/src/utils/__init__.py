@@ -2,6 +2,7 @@
 
 # Web scraping utilities
 from .web_scraping import (
+    HTMLDocument,
     fallback_html_fetcher,
     extract_text_from_html,
     fetch_and_extract_text,
@@ -11,6 +12,8 @@ from .web_scraping import (
 
 # File text extraction utilities
 from .file_text_extractor import (
+    extract_text_from_file,
+    iter_pdf_pages,
     extract_text_from_pdf,
     extract_text_from_pdf_bytes,
     extract_text_from_txt,
@@ -19,12 +22,15 @@ from .file_text_extractor import (
 
 __all__ = [
     # Web scraping
+    "HTMLDocument",
     "fallback_html_fetcher",
     "extract_text_from_html", 
     "fetch_and_extract_text",
     "is_javascript_placeholder",
     "fetch_with_playwright",
     # File extraction
+    "extract_text_from_file",
+    "iter_pdf_pages",
     "extract_text_from_pdf",
     "extract_text_from_pdf_bytes",
     "extract_text_from_txt",
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+from config import settings
+from utils.request_timing import outbound_span
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/117.0.0.0 Safari/537.36"
+)
+
+
+class _PooledContext:
+    """A browser context plus the number of pages it has navigated"""
+
+    def __init__(self, context: BrowserContext):
+        self.context = context
+        self.navigations = 0
+
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium shared by every Playwright fetch.
+
+    At most max_contexts pages render at once, each in a reusable browser
+    context. A context is closed and replaced after max_navigations pages so
+    its memory cannot grow without bound, and the browser is relaunched if it
+    crashes. Requests for the blocked resource types (images, fonts, media by
+    default) are aborted, since only the HTML is needed.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = 4,
+        max_navigations: int = 50,
+        navigation_timeout_ms: float = 30000,
+        blocked_resource_types: Iterable[str] = ("image", "font", "media"),
+    ):
+        self.max_contexts = max_contexts
+        self.max_navigations = max_navigations
+        self.navigation_timeout_ms = navigation_timeout_ms
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._idle: List[_PooledContext] = []
+        self._slots = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+
+    async def fetch(self, url: str, wait_until: str = "networkidle") -> str:
+        """Render a URL in a pooled context and return the page HTML"""
+        with outbound_span("browser"):
+            return await self._fetch(url, wait_until)
+
+    async def _fetch(self, url: str, wait_until: str) -> str:
+        async with self._slots:
+            pooled = await self._acquire()
+            healthy = False
+            try:
+                page = await pooled.context.new_page()
+                try:
+                    pooled.navigations += 1
+                    await page.goto(
+                        url, wait_until=wait_until, timeout=self.navigation_timeout_ms
+                    )
+                    html = await page.content()
+                finally:
+                    await page.close()
+                healthy = True
+                return html
+            finally:
+                await self._release(pooled, healthy)
+
+    async def close(self) -> None:
+        """Close every context, the browser and the Playwright driver"""
+        async with self._lock:
+            idle, self._idle = self._idle, []
+            for pooled in idle:
+                await self._close_context(pooled)
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _acquire(self) -> _PooledContext:
+        async with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            browser = await self._get_browser()
+            context = await browser.new_context(user_agent=USER_AGENT)
+            if self.blocked_resource_types:
+                await context.route("**/*", self._route)
+            return _PooledContext(context)
+
+    async def _release(self, pooled: _PooledContext, healthy: bool) -> None:
+        """Return a context for reuse, or close it if it failed or is worn out"""
+        if (
+            healthy
+            and pooled.navigations < self.max_navigations
+            and self._browser is not None
+            and self._browser.is_connected()
+        ):
+            self._idle.append(pooled)
+        else:
+            await self._close_context(pooled)
+
+    async def _get_browser(self) -> Browser:
+        """Launch the browser on first use, or again after it disconnected"""
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        if self._playwright is None:
+            # Imported here so the API starts without loading Playwright
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+        # Contexts of a dead browser cannot be reused
+        self._idle = []
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        return self._browser
+
+    async def _route(self, route) -> None:
+        if route.request.resource_type in self.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @staticmethod
+    async def _close_context(pooled: _PooledContext) -> None:
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+
+_pool: Optional[BrowserPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """The process-wide pool, created on first use in the running event loop"""
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        blocked = [
+            resource_type.strip()
+            for resource_type in settings.BROWSER_BLOCK_RESOURCES.split(",")
+            if resource_type.strip()
+        ]
+        _pool = BrowserPool(
+            max_contexts=settings.BROWSER_POOL_MAX_CONTEXTS,
+            max_navigations=settings.BROWSER_CONTEXT_MAX_NAVIGATIONS,
+            navigation_timeout_ms=settings.BROWSER_NAVIGATION_TIMEOUT_SECONDS * 1000,
+            blocked_resource_types=blocked,
+        )
+        _pool_loop = loop
+    return _pool
+
+
+async def shutdown_browser_pool() -> None:
+    """Close the shared browser; the next fetch launches a new one"""
+    global _pool, _pool_loop
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        _pool_loop = None
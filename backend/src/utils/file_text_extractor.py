@@ -1,40 +1,126 @@
-from pdfminer.high_level import extract_text
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
 from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO, Iterator, Optional, Union
+
+if TYPE_CHECKING:
+    from pdfminer.layout import LAParams
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def pdf_laparams() -> LAParams:
+    """
+    Layout analysis tuned for plain text extraction: boxes_flow=None skips the
+    expensive reading-order pass, and vertical text detection is rarely needed
+    """
+    from pdfminer.layout import LAParams
+
+    return LAParams(boxes_flow=None, detect_vertical=False)
+
+
+def iter_pdf_pages(
+    source: Union[str, BinaryIO],
+    max_pages: Optional[int] = None,
+    laparams: Optional[LAParams] = None,
+) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF, parsing pages lazily.
+
+    source is a file path or a seekable binary file, so large uploads can be
+    read straight from a spooled temp file. Stop iterating to stop parsing.
+    laparams defaults to pdf_laparams().
+    """
+    # pdfminer is imported on first use, keeping it out of API startup
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    if laparams is None:
+        laparams = pdf_laparams()
+    for page in extract_pages(source, maxpages=max_pages or 0, laparams=laparams):
+        yield "".join(
+            element.get_text()
+            for element in page
+            if isinstance(element, LTTextContainer)
+        )
+
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_text_from_pdf(
+    file_path: Union[str, BinaryIO],
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """
+    Extract text from a PDF, stopping after max_pages pages or max_chars
+    characters. If a page fails to parse, the text of the pages before it
+    is returned.
+    """
+    parts = []
+    length = 0
     try:
-        return extract_text(file_path)
+        for text in iter_pdf_pages(file_path, max_pages=max_pages):
+            parts.append(text)
+            length += len(text)
+            if max_chars is not None and length >= max_chars:
+                break
     except Exception as e:
-        print(f"Failed to extract text from PDF: {e}")
-        return ""
+        logger.warning(f"Failed to extract text from PDF after {len(parts)} pages: {e}")
+    text = "\f".join(parts)
+    return text[:max_chars] if max_chars is not None else text
+
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+def extract_text_from_pdf_bytes(
+    pdf_bytes: bytes, max_pages: Optional[int] = None, max_chars: Optional[int] = None
+) -> str:
     """Extract text from PDF bytes using pdfminer"""
-    try:
-        pdf_stream = BytesIO(pdf_bytes)
-        return extract_text(pdf_stream)
-    except Exception as e:
-        print(f"Failed to extract text from PDF bytes: {e}")
-        return ""
+    return extract_text_from_pdf(
+        BytesIO(pdf_bytes), max_pages=max_pages, max_chars=max_chars
+    )
+
 
-def extract_text_from_txt(file_path: str) -> str:
+def extract_text_from_txt(file_path: str, max_chars: Optional[int] = None) -> str:
+    limit = -1 if max_chars is None else max_chars
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return f.read(limit)
+        except UnicodeDecodeError:
+            with open(file_path, "r", encoding="latin-1") as f:
+                return f.read(limit)
     except Exception as e:
-        print(f"Failed to extract text from TXT: {e}")
+        logger.warning(f"Failed to extract text from TXT: {e}")
         return ""
 
+
 def extract_text_from_txt_bytes(txt_bytes: bytes) -> str:
     """Extract text from TXT bytes using UTF-8 decoding"""
     try:
-        return txt_bytes.decode('utf-8')
+        return txt_bytes.decode("utf-8")
     except UnicodeDecodeError:
         try:
-            return txt_bytes.decode('latin-1')
+            return txt_bytes.decode("latin-1")
         except Exception as e:
-            print(f"Failed to decode text bytes: {e}")
+            logger.warning(f"Failed to decode text bytes: {e}")
             return ""
     except Exception as e:
-        print(f"Failed to extract text from TXT bytes: {e}")
-        return ""
\ No newline at end of file
+        logger.warning(f"Failed to extract text from TXT bytes: {e}")
+        return ""
+
+
+def extract_text_from_file(
+    file_path: str,
+    filename: str,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """Extract text from an uploaded PDF or TXT file on disk, chosen by its filename"""
+    if filename.lower().endswith(".pdf"):
+        return extract_text_from_pdf(
+            file_path, max_pages=max_pages, max_chars=max_chars
+        )
+    if filename.lower().endswith(".txt"):
+        return extract_text_from_txt(file_path, max_chars=max_chars)
+    raise ValueError(f"Unsupported file type: {filename}")
@@ -0,0 +1,224 @@
+import asyncio
+import codecs
+import random
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+import httpx
+from config import settings
+from utils.request_timing import outbound_span
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/117.0.0.0 Safari/537.36"
+)
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HTTPFetchError(RuntimeError):
+    """A URL could not be fetched"""
+
+
+class ResponseTooLargeError(HTTPFetchError):
+    """The response body exceeded HTTP_MAX_RESPONSE_BYTES"""
+
+
+@dataclass
+class FetchResponse:
+    url: str
+    status_code: int
+    headers: httpx.Headers
+    text: str
+
+
+class _HostLimit:
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(settings.HTTP_PER_HOST_CONCURRENCY)
+        # Requests holding or waiting for the semaphore
+        self.users = 0
+
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_limits: Dict[str, _HostLimit] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The shared client, created on first use in the running event loop.
+
+    Connections are kept alive and reused across fetches, and HTTP/2 is
+    negotiated when the h2 package is installed.
+    """
+    global _client, _client_loop, _host_limits
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            headers={"User-Agent": USER_AGENT},
+        )
+        _client_loop = loop
+        _host_limits = {}
+    return _client
+
+
+@asynccontextmanager
+async def _host_slot(host: str) -> AsyncIterator[None]:
+    """
+    Hold one of a host's HTTP_PER_HOST_CONCURRENCY slots. A host's entry is
+    dropped once no request holds or waits for it, so the table only grows
+    with the hosts in flight, not every host ever fetched.
+    """
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = _HostLimit()
+    limit.users += 1
+    try:
+        async with limit.semaphore:
+            yield
+    finally:
+        limit.users -= 1
+        if limit.users == 0 and _host_limits.get(host) is limit:
+            del _host_limits[host]
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections"""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+
+
+async def fetch(
+    url: str,
+    headers: Optional[Mapping[str, str]] = None,
+    max_bytes: Optional[int] = None,
+) -> FetchResponse:
+    """
+    GET a URL through the shared client.
+
+    At most HTTP_PER_HOST_CONCURRENCY requests run against one host at a
+    time. Connection errors, 429 and 5xx responses are retried up to
+    HTTP_MAX_RETRIES times with jittered exponential backoff, honouring
+    Retry-After. The body is streamed and decoded incrementally, and the
+    fetch is aborted once it exceeds max_bytes (HTTP_MAX_RESPONSE_BYTES by
+    default). Any other status is returned to the caller as is.
+    """
+    client = get_http_client()
+    max_bytes = settings.HTTP_MAX_RESPONSE_BYTES if max_bytes is None else max_bytes
+    host = urlparse(url).netloc.lower()
+
+    attempt = 0
+    while True:
+        try:
+            async with _host_slot(host):
+                with outbound_span("http"):
+                    response = await _get(client, url, headers, max_bytes)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            error: Exception = HTTPFetchError(
+                f"GET {url} returned {response.status_code}"
+            )
+            retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+        except httpx.TransportError as e:
+            error = HTTPFetchError(f"GET {url} failed: {e}")
+            retry_after = None
+
+        if attempt >= settings.HTTP_MAX_RETRIES:
+            raise error
+        delay = settings.HTTP_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay *= random.uniform(0.5, 1.5)
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def fetch_text(url: str, max_bytes: Optional[int] = None) -> str:
+    """Fetch a URL and return its decoded body, raising on error statuses"""
+    response = await fetch(url, max_bytes=max_bytes)
+    if response.status_code >= 400:
+        raise HTTPFetchError(f"GET {url} returned {response.status_code}")
+    return response.text
+
+
+async def _get(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Mapping[str, str]],
+    max_bytes: int,
+) -> FetchResponse:
+    async with client.stream("GET", url, headers=headers) as response:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLargeError(
+                f"GET {url}: Content-Length {declared} exceeds {max_bytes} bytes"
+            )
+
+        decoder = codecs.getincrementaldecoder(_encoding(response))(errors="replace")
+        parts = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > max_bytes:
+                raise ResponseTooLargeError(
+                    f"GET {url}: body exceeds {max_bytes} bytes"
+                )
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+
+        return FetchResponse(
+            url=str(response.url),
+            status_code=response.status_code,
+            headers=response.headers,
+            text="".join(parts),
+        )
+
+
+def _encoding(response: httpx.Response) -> str:
+    """Charset from the Content-Type header, or UTF-8"""
+    charset = response.charset_encoding
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), settings.HTTP_RETRY_MAX_WAIT_SECONDS)
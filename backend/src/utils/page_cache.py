@@ -0,0 +1,312 @@
+"""
+On-disk cache of fetched pages, keyed by normalized URL.
+
+Each entry keeps the raw HTML, the text extracted from it and the response
+validators (ETag / Last-Modified). Freshness follows the response's
+Cache-Control (or Expires) header, falling back to a default TTL; stale
+entries are revalidated with a conditional request so an unchanged page
+costs a 304 instead of a download and a Playwright render. The store is
+bounded by total size and evicts the least recently used pages.
+
+Servers never see a URL's fragment, so plain fetches are keyed without it;
+pages rendered by Playwright keep it, since client-side routing can make
+the fragment select what is rendered.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import settings
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|mc_cid|mc_eid)$", re.IGNORECASE)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str, rendered: bool = False) -> str:
+    """
+    Canonical form of a URL for cache lookups: lowercase scheme and host,
+    no default port or tracking parameters, sorted query. The fragment is
+    dropped, except for rendered pages, whose keys always end in "#" and
+    the fragment so they never collide with a plain fetch of the URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not TRACKING_PARAMS.match(key)
+        )
+    )
+    key = urlunsplit((scheme, host, parts.path or "/", query, ""))
+    return f"{key}#{parts.fragment}" if rendered else key
+
+
+def freshness_lifetime(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Seconds a response may be served without revalidation, from its
+    Cache-Control or Expires header. None means the response must not be
+    stored; 0 means it must be revalidated before every use.
+    """
+    if headers is None:
+        return settings.PAGE_CACHE_DEFAULT_TTL_SECONDS
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name, "").isdigit():
+            return float(directives[name])
+    if headers.get("Expires"):
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return 0
+        return max(expires - time.time(), 0)
+    return settings.PAGE_CACHE_DEFAULT_TTL_SECONDS
+
+
+@dataclass
+class CachedPage:
+    key: str
+    html: str
+    text: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Headers that turn a GET into a conditional request for this page"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    SQLite store of fetched pages; evicts least recently used rows beyond
+    max_bytes. Counts a hit for each fresh page get() returns, a
+    revalidation for each refresh() and a miss for each store().
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = 200 * 1024 * 1024, touch_interval: float = 300
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Reads only move a page's access time forward once it is this old
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS page_cache (
+                url TEXT PRIMARY KEY,
+                html TEXT NOT NULL,
+                text TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_page_cache_accessed "
+            "ON page_cache(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        The stored page for a URL, fresh or stale, or None. A page rendered
+        for this exact URL wins over a plain fetch of it.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, html, text, etag, last_modified, expires_at, accessed_at "
+                "FROM page_cache WHERE url IN (?, ?) ORDER BY LENGTH(url) DESC LIMIT 1",
+                (normalize_url(url, rendered=True), normalize_url(url)),
+            ).fetchone()
+            if row is None:
+                return None
+            page = CachedPage(*row[:-1])
+            if page.is_fresh:
+                self.hits += 1
+            now = time.time()
+            if now - row[-1] > self.touch_interval:
+                self._conn.execute(
+                    "UPDATE page_cache SET accessed_at = ? WHERE url = ?",
+                    (now, page.key),
+                )
+                self._conn.commit()
+        return page
+
+    def store(
+        self,
+        url: str,
+        html: str,
+        headers: Optional[Mapping[str, str]] = None,
+        rendered: bool = False,
+    ) -> Optional[str]:
+        """
+        Save a page fetched with the given response headers; pages without
+        headers get the default TTL. rendered marks HTML produced by
+        Playwright, which is keyed with the URL's fragment. Responses marked
+        no-store are dropped. Returns the page's key, or None if not stored.
+        """
+        lifetime = freshness_lifetime(headers)
+        key = normalize_url(url, rendered=rendered)
+        with self._lock:
+            self.misses += 1
+        if lifetime is None:
+            self.delete(key)
+            return None
+        now = time.time()
+        with self._lock:
+            if not rendered:
+                # The page no longer needs rendering; drop the rendered copy
+                self._conn.execute(
+                    "DELETE FROM page_cache WHERE url = ?",
+                    (normalize_url(url, rendered=True),),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_cache "
+                "(url, html, text, etag, last_modified, expires_at, size, "
+                "fetched_at, accessed_at) "
+                "VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    html,
+                    headers.get("ETag") if headers else None,
+                    headers.get("Last-Modified") if headers else None,
+                    now + lifetime,
+                    len(html.encode("utf-8")),
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+        return key
+
+    def refresh(self, key: str, headers: Mapping[str, str]) -> None:
+        """Extend the freshness of the page stored under key after a 304 Not Modified"""
+        lifetime = freshness_lifetime(headers)
+        with self._lock:
+            self.revalidated += 1
+        if lifetime is None:
+            self.delete(key)
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE page_cache SET expires_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE url = ?",
+                (
+                    time.time() + lifetime,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    key,
+                ),
+            )
+            self._conn.commit()
+
+    def set_text(self, key: str, text: str) -> None:
+        """Attach the extracted text to the page stored under key"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE page_cache SET text = ?, size = LENGTH(CAST(html AS BLOB)) + ? "
+                "WHERE url = ?",
+                (text, len(text.encode("utf-8")), key),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM page_cache WHERE url = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM page_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM page_cache"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self) -> None:
+        """Drop least recently used pages until the store fits in max_bytes"""
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM page_cache"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM page_cache ORDER BY accessed_at ASC"
+        ):
+            if excess <= 0:
+                break
+            doomed.append((url,))
+            excess -= size
+        self._conn.executemany("DELETE FROM page_cache WHERE url = ?", doomed)
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or None when it is disabled"""
+    global _cache
+    if not settings.PAGE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PageCache(
+                    settings.PAGE_CACHE_PATH, max_bytes=settings.PAGE_CACHE_MAX_BYTES
+                )
+    return _cache
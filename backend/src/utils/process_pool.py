@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import settings
+from logging_config import configure_logging
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool for CPU-bound work such as PDF parsing, created on first use"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.EXTRACTION_PROCESS_WORKERS),
+            # Forked workers inherit the queue handler but not its listener thread
+            initializer=configure_logging,
+            initargs=(None, None, True),
+        )
+    return _pool
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable module-level function in the shared pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+
+def shutdown_process_pool() -> None:
+    """Stop the pool's workers; a later get_process_pool call starts a new pool"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
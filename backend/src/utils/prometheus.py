@@ -0,0 +1,17 @@
+"""Helpers for rendering metrics in the Prometheus text exposition format"""
+
+from typing import List
+
+
+def metric_header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def format_labels(**labels: str) -> str:
+    pairs = []
+    for name, value in labels.items():
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
@@ -0,0 +1,317 @@
+"""
+Per-request timing for the API.
+
+RequestTimingMiddleware opens a RequestTrace for every HTTP request and
+keeps it in a context variable, which follows the request into threadpool
+routes and asyncio.to_thread calls. It also binds the request id that log
+records carry (X-Request-ID, taken from the request or generated, and
+echoed on the response). While the trace is open:
+- SQLAlchemy cursor events on the engine count each query and its time,
+- outbound_span() adds the time spent in outbound calls by kind
+  ("http", "browser", "llm").
+When the request ends its latency goes into a per-route histogram, and
+requests slower than SLOW_REQUEST_THRESHOLD_MS log a trace with the
+slowest and most repeated statements, which is where N+1 queries show.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from logging_config import bind_request_id, get_request_id, reset_request_id
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.prometheus import format_labels, metric_header
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bound parameters and literals vary between repeats of the same query
+LITERAL_PATTERN = re.compile(r"'[^']*'|\b\d+\b")
+
+
+@dataclass
+class RequestTrace:
+    method: str
+    path: str
+    request_id: Optional[str] = None
+    route: str = "unmatched"
+    status: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    duration: float = 0.0
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    outbound: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_query(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+            self.statements.append((statement, seconds))
+
+    def add_outbound(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self.outbound[kind].append(seconds)
+
+    def to_dict(self, max_statements: int = 10) -> Dict[str, Any]:
+        repeats = Counter(
+            LITERAL_PATTERN.sub("?", " ".join(sql.split()))
+            for sql, _ in self.statements
+        )
+        slowest = sorted(self.statements, key=lambda item: item[1], reverse=True)
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 1),
+            "db": {
+                "queries": self.db_queries,
+                "ms": round(self.db_seconds * 1000, 1),
+                "slowest": [
+                    {"ms": round(seconds * 1000, 2), "sql": " ".join(sql.split())[:500]}
+                    for sql, seconds in slowest[:max_statements]
+                ],
+                "repeated": [
+                    {"count": count, "sql": sql[:500]}
+                    for sql, count in repeats.most_common(max_statements)
+                    if count > 1
+                ],
+            },
+            "outbound": {
+                kind: {"calls": len(times), "ms": round(sum(times) * 1000, 1)}
+                for kind, times in self.outbound.items()
+            },
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "request_trace", default=None
+)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def outbound_span(kind: str) -> Iterator[None]:
+    """Time an outbound call against the current request, if there is one"""
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add_outbound(kind, time.perf_counter() - start)
+
+
+class RequestMetrics:
+    """Per-route latency histograms and DB / outbound totals, in Prometheus form"""
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.latency_buckets: Dict[Tuple[str, str], List[int]] = {}
+        self.latency_sum: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.latency_count: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.db_queries: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.db_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.outbound_seconds: Dict[Tuple[str, str, str], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, trace: RequestTrace) -> None:
+        key = (trace.method, trace.route)
+        with self._lock:
+            self.requests[(trace.method, trace.route, trace.status)] += 1
+            buckets = self.latency_buckets.setdefault(key, [0] * len(LATENCY_BUCKETS))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if trace.duration <= bound:
+                    buckets[i] += 1
+            self.latency_sum[key] += trace.duration
+            self.latency_count[key] += 1
+            self.db_queries[key] += trace.db_queries
+            self.db_seconds[key] += trace.db_seconds
+            for kind, times in trace.outbound.items():
+                self.outbound_seconds[(trace.method, trace.route, kind)] += sum(times)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            lines += metric_header(
+                "http_requests_total", "counter", "HTTP requests handled"
+            )
+            for (method, route, status), value in sorted(self.requests.items()):
+                labels = format_labels(method=method, route=route, status=str(status))
+                lines.append(f"http_requests_total{labels} {value}")
+
+            lines += metric_header(
+                "http_request_duration_seconds",
+                "histogram",
+                "HTTP request latency by route",
+            )
+            for (method, route), buckets in sorted(self.latency_buckets.items()):
+                count = self.latency_count[(method, route)]
+                for bound, value in zip(LATENCY_BUCKETS, buckets):
+                    labels = format_labels(method=method, route=route, le=str(bound))
+                    lines.append(
+                        f"http_request_duration_seconds_bucket{labels} {value}"
+                    )
+                labels = format_labels(method=method, route=route, le="+Inf")
+                lines.append(f"http_request_duration_seconds_bucket{labels} {count}")
+                labels = format_labels(method=method, route=route)
+                total = self.latency_sum[(method, route)]
+                lines.append(f"http_request_duration_seconds_sum{labels} {total:.6f}")
+                lines.append(f"http_request_duration_seconds_count{labels} {count}")
+
+            lines += metric_header(
+                "http_request_db_queries_total",
+                "counter",
+                "SQL statements run by requests",
+            )
+            for (method, route), value in sorted(self.db_queries.items()):
+                labels = format_labels(method=method, route=route)
+                lines.append(f"http_request_db_queries_total{labels} {value}")
+
+            lines += metric_header(
+                "http_request_db_seconds_total", "counter", "Time requests spent in SQL"
+            )
+            for (method, route), value in sorted(self.db_seconds.items()):
+                labels = format_labels(method=method, route=route)
+                lines.append(f"http_request_db_seconds_total{labels} {value:.6f}")
+
+            lines += metric_header(
+                "http_request_outbound_seconds_total",
+                "counter",
+                "Time requests spent waiting on outbound HTTP, browser and LLM calls",
+            )
+            for (method, route, kind), value in sorted(self.outbound_seconds.items()):
+                labels = format_labels(method=method, route=route, kind=kind)
+                lines.append(f"http_request_outbound_seconds_total{labels} {value:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+_request_metrics = RequestMetrics()
+
+
+def get_request_metrics() -> RequestMetrics:
+    return _request_metrics
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request. Written against raw ASGI
+    rather than BaseHTTPMiddleware so streamed (SSE) responses pass through
+    untouched; their duration runs until the stream ends.
+    """
+
+    def __init__(self, app, slow_threshold_ms: Optional[float] = None):
+        self.app = app
+        self.slow_threshold = (
+            settings.SLOW_REQUEST_THRESHOLD_MS
+            if slow_threshold_ms is None
+            else slow_threshold_ms
+        ) / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Reuse the caller's X-Request-ID (e.g. from a proxy) so logs line up
+        # across services
+        incoming = (
+            dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:64]
+        )
+        id_token = bind_request_id(incoming or None)
+        trace = RequestTrace(
+            method=scope["method"], path=scope["path"], request_id=get_request_id()
+        )
+        token = _current_trace.set(trace)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", trace.request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            trace.status = 500
+            raise
+        finally:
+            _current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.started
+            trace.route = _route_template(scope)
+            _request_metrics.observe(trace)
+            if trace.duration >= self.slow_threshold:
+                logger.warning(
+                    f"Slow request {trace.method} {trace.route}: "
+                    f"{trace.duration * 1000:.0f} ms, {trace.db_queries} queries",
+                    extra={
+                        "trace": trace.to_dict(settings.SLOW_REQUEST_TRACE_STATEMENTS)
+                    },
+                )
+            reset_request_id(id_token)
+
+
+def _route_template(scope) -> str:
+    """
+    The matched route as a template, e.g. /opportunities/{opportunity_id}, so
+    every opportunity shares one histogram. Built from the path and its
+    path_params, since the route object of an included router does not
+    carry the router prefix on every FastAPI version.
+    """
+    if "endpoint" not in scope:
+        return "unmatched"
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment
+        for segment in scope["path"].split("/")
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_query(statement, elapsed)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count SQL statements and their time against the current request.
+    Safe to call more than once; the listeners are only added once.
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -1,10 +1,19 @@
+from __future__ import annotations
+
 import asyncio
+import importlib.util
+import logging
 import re
-from typing import Optional
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+from .browser_pool import get_browser_pool, shutdown_browser_pool
+from .http_client import HTTPFetchError, close_http_client, fetch
+from .page_cache import get_page_cache
 
-import requests
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
 
 # Common JavaScript placeholder strings that indicate a page needs JS to render
 JS_PLACEHOLDER_STRINGS = [
@@ -15,52 +24,111 @@ JS_PLACEHOLDER_STRINGS = [
     "Enable JavaScript to continue",
 ]
 
+# Pages with less visible text than this are treated as JavaScript shells
+MIN_CONTENT_CHARS = 100
+
+# Checked without importing lxml; BeautifulSoup loads it on the first parse
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+# Script/style bodies and comments never contribute visible text; dropping them
+# up front shrinks what the parser has to walk on script-heavy pages
+NON_CONTENT_PATTERN = re.compile(
+    r"<script\b[^>]*>[^<]*(?:<(?!/script)[^<]*)*</script\s*>"
+    r"|<style\b[^>]*>[^<]*(?:<(?!/style)[^<]*)*</style\s*>"
+    r"|<!--.*?-->",
+    re.IGNORECASE | re.DOTALL,
+)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class HTMLDocument:
+    """
+    A fetched page, parsed at most once and shared by JavaScript detection
+    and text extraction. Uses lxml when it is installed, html.parser otherwise.
+    """
+
+    def __init__(self, html: str):
+        self.html = html
+        self._content_html: Optional[str] = None
+        self._soup: Optional[BeautifulSoup] = None
+        self._text: Optional[str] = None
+
+    @property
+    def content_html(self) -> str:
+        """The HTML without script/style bodies and comments"""
+        if self._content_html is None:
+            self._content_html = NON_CONTENT_PATTERN.sub("", self.html)
+        return self._content_html
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+
+            self._soup = BeautifulSoup(self.content_html, HTML_PARSER)
+        return self._soup
+
+    @property
+    def text(self) -> str:
+        """Visible text, one string per line"""
+        if self._text is None:
+            self._text = self.soup.get_text(separator="\n", strip=True)
+        return self._text
 
-def is_javascript_placeholder(html: str) -> bool:
+    def has_enough_text(self, min_chars: int) -> bool:
+        """
+        Cheap test, without parsing, that the page has at least min_chars
+        of visible text. False only means the regex estimate fell short.
+        """
+        visible = TAG_PATTERN.sub(" ", self.content_html)
+        return len(WHITESPACE_PATTERN.sub("", visible)) >= min_chars
+
+
+def _as_document(html: Union[str, HTMLDocument]) -> HTMLDocument:
+    return html if isinstance(html, HTMLDocument) else HTMLDocument(html)
+
+
+def is_javascript_placeholder(html: Union[str, HTMLDocument]) -> bool:
     """
     Check if the HTML content contains JavaScript placeholder text
     indicating the page requires JavaScript to render properly.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text(separator="\n", strip=True)
+    doc = _as_document(html)
+    # Fast path: no placeholder phrase anywhere in the markup and plenty of
+    # text means a real page, so large pages skip the full parse here
+    has_phrase = any(phrase in doc.html for phrase in JS_PLACEHOLDER_STRINGS)
+    if not has_phrase and doc.has_enough_text(2 * MIN_CONTENT_CHARS):
+        return False
+    text = doc.text
     return (
         any(phrase in text for phrase in JS_PLACEHOLDER_STRINGS)
-        or len(text.strip()) < 100
+        or len(text.strip()) < MIN_CONTENT_CHARS
     )
 
 
 async def fetch_with_playwright(url: str) -> str:
     """
     Fetch HTML content using Playwright to handle JavaScript-rendered pages.
+    Pages are rendered in the shared browser pool rather than a fresh browser.
     """
-    user_agent = (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/117.0.0.0 Safari/537.36"
-    )
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=user_agent)
-        page = await context.new_page()
-        await page.goto(url, wait_until="networkidle")
-        html = await page.content()
-        await browser.close()
-        return html
+    return await get_browser_pool().fetch(url, wait_until="networkidle")
 
 
-def extract_github_content(html: str, url: str) -> str:
+def extract_github_content(html: Union[str, HTMLDocument], url: str) -> str:
     """
     Extract meaningful content from GitHub repository pages.
 
     Args:
-        html: Raw HTML content from GitHub
+        html: Raw HTML content from GitHub, or its parsed HTMLDocument
         url: The GitHub URL
 
     Returns:
         Structured content from the repository
     """
-    soup = BeautifulSoup(html, "html.parser")
+    doc = _as_document(html)
+    soup = doc.soup
     content_parts = []
 
     # Extract repository name and description
@@ -100,14 +168,15 @@ def extract_github_content(html: str, url: str) -> str:
 
     # If no specific content found, fall back to general text extraction
     if not content_parts:
-        return extract_text_from_html(html)
+        return extract_text_from_html(doc)
 
     return "\n\n".join(content_parts)
 
 
 async def fallback_html_fetcher(url: str) -> str:
     """
-    Fetch HTML content from a URL with fallback to Playwright for JavaScript-heavy pages.
+    Fetch HTML content from a URL with fallback to Playwright for
+    JavaScript-heavy pages.
 
     Args:
         url: The URL to fetch HTML from
@@ -116,47 +185,77 @@ async def fallback_html_fetcher(url: str) -> str:
         The HTML content as a string
 
     Raises:
-        RuntimeError: If both requests and Playwright fail to load the URL
+        RuntimeError: If both the HTTP fetch and Playwright fail to load the URL
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
-    }
+    return (await _fetch_document(url)).doc.html
+
+
+class _FetchedPage(NamedTuple):
+    doc: HTMLDocument
+    # Page cache key the document is stored under, if it is cached
+    cache_key: Optional[str] = None
+    # Text extracted from the cached copy earlier, when that copy was served
+    text: Optional[str] = None
 
-    # First try: simple HTTP request
+
+async def _fetch_document(url: str) -> _FetchedPage:
+    """fallback_html_fetcher, keeping the document parsed for JS detection"""
+    cache = get_page_cache()
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+    if cached is not None and cached.is_fresh:
+        return _FetchedPage(HTMLDocument(cached.html), cached.key, cached.text)
+
+    # First try: plain HTTP request through the shared async client,
+    # conditional on the cached copy's validators if there is one
+    headers = None
     try:
-        resp = requests.get(url, timeout=10, headers=headers)
-        html = resp.text
-        if not is_javascript_placeholder(html):
-            return html
-        print(f"Detected JavaScript-only page, falling back to Playwright for {url}")
+        response = await fetch(url, headers=cached.validators() if cached else None)
+        if response.status_code == 304 and cached is not None:
+            await asyncio.to_thread(cache.refresh, cached.key, response.headers)
+            return _FetchedPage(HTMLDocument(cached.html), cached.key, cached.text)
+        if response.status_code >= 400:
+            raise HTTPFetchError(f"GET {url} returned {response.status_code}")
+        headers = response.headers
+        doc = HTMLDocument(response.text)
+        if not is_javascript_placeholder(doc):
+            key = (
+                await asyncio.to_thread(cache.store, url, doc.html, headers)
+                if cache
+                else None
+            )
+            return _FetchedPage(doc, key)
+        logger.info(
+            f"Detected JavaScript-only page, falling back to Playwright for {url}"
+        )
     except Exception as e:
-        print(f"requests.get() failed for {url}: {e}")
+        logger.warning(f"HTTP fetch failed for {url}: {e}")
 
     # Fallback: render page with Playwright
     try:
-        return await fetch_with_playwright(url)
+        html = await fetch_with_playwright(url)
     except Exception as e:
         raise RuntimeError(f"Playwright failed to load {url}: {e}")
+    key = None
+    if cache:
+        # Keyed to the placeholder response's validators, so a 304 on the
+        # shell page serves the rendered HTML without another render
+        key = await asyncio.to_thread(cache.store, url, html, headers, rendered=True)
+    return _FetchedPage(HTMLDocument(html), key)
 
 
-def extract_text_from_html(html: str) -> str:
+def extract_text_from_html(html: Union[str, HTMLDocument]) -> str:
     """
-    Extract clean text content from HTML, removing scripts, styles, and other non-content elements.
+    Extract clean text content from HTML, removing scripts, styles, and other
+    non-content elements.
 
     Args:
-        html: Raw HTML content
+        html: Raw HTML content, or its parsed HTMLDocument
 
     Returns:
         Clean text content
     """
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.decompose()
-
-    # Get text and clean it up
-    text = soup.get_text(separator="\n", strip=True)
+    # Script and style elements are already stripped from the document
+    text = _as_document(html).text
 
     # Remove excessive whitespace
     lines = (line.strip() for line in text.splitlines())
@@ -177,18 +276,34 @@ async def fetch_and_extract_text(url: str) -> str:
     Returns:
         Clean text content from the webpage
     """
-    html = await fallback_html_fetcher(url)
+    doc, cache_key, cached_text = await _fetch_document(url)
+    if cached_text is not None:
+        # Served from the cache: reuse the text extracted last time
+        return cached_text
 
     # Special handling for GitHub repositories
     if "github.com" in url and "/" in url.split("github.com/")[-1]:
-        print(f"Detected GitHub repository: {url}")
-        return extract_github_content(html, url)
+        logger.debug(f"Detected GitHub repository: {url}")
+        text = extract_github_content(doc, url)
+    else:
+        text = extract_text_from_html(doc)
 
-    return extract_text_from_html(html)
+    if cache_key is not None:
+        await asyncio.to_thread(get_page_cache().set_text, cache_key, text)
+    return text
 
 
 def fetch_and_extract_text_sync(url: str) -> str:
     """
     Synchronous wrapper for fetch_and_extract_text.
     """
-    return asyncio.run(fetch_and_extract_text(url))
+
+    async def fetch_and_close() -> str:
+        try:
+            return await fetch_and_extract_text(url)
+        finally:
+            # The browser pool and HTTP client are bound to this short-lived event loop
+            await shutdown_browser_pool()
+            await close_http_client()
+
+    return asyncio.run(fetch_and_close())
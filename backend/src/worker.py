@@ -0,0 +1,65 @@
+"""
+Assessment queue worker.
+
+Runs separately from the API process and drains pending rows of the
+`assessments` table:
+
+    python src/worker.py --concurrency 4
+"""
+
+import argparse
+import signal
+
+from api.llm_metrics import get_llm_metrics
+from config import settings
+from db.session import init_db
+from logging_config import configure_logging
+from services.assessment_worker import AssessmentWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the assessment queue worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.ASSESSMENT_WORKER_CONCURRENCY,
+        help="Number of assessments processed in parallel",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=int,
+        default=settings.ASSESSMENT_LEASE_SECONDS,
+        help="How long a claimed assessment stays invisible to other workers",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=settings.ASSESSMENT_POLL_INTERVAL_SECONDS,
+        help="Seconds to wait before polling an empty queue again",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=settings.ASSESSMENT_MAX_ATTEMPTS,
+        help="Attempts before an assessment is marked failed",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+
+    init_db()
+
+    worker = AssessmentWorker(
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+        max_attempts=args.max_attempts,
+    )
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    worker.run()
+    get_llm_metrics().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 # Function to cleanup background processes
 cleanup() {
     echo "🛑 Shutting down services..."
-    kill $BACKEND_PID $FRONTEND_PID 2>/dev/null
+    kill $BACKEND_PID $WORKER_PID $FRONTEND_PID 2>/dev/null
     exit 0
 }
 
@@ -33,6 +33,12 @@ BACKEND_PID=$!
 
 echo "[dev.sh] FastAPI backend started on port 8000 (PID $BACKEND_PID)"
 
+# Start the assessment worker, which processes the queued assessments
+python backend/src/worker.py &
+WORKER_PID=$!
+
+echo "[dev.sh] Assessment worker started (PID $WORKER_PID)"
+
 # Start Vite frontend
 echo "[dev.sh] Starting Vite frontend on port 5173..."
 cd frontend && npm run dev &
@@ -41,7 +47,7 @@ cd ..
 
 echo "[dev.sh] Vite frontend started on port 5173 (PID $FRONTEND_PID)"
 
-echo "[dev.sh] Both backend and frontend are running. Press Ctrl+C to stop."
+echo "[dev.sh] Backend, worker and frontend are running. Press Ctrl+C to stop."
 
 # Wait for both to exit
-wait $BACKEND_PID $FRONTEND_PID 
\ No newline at end of file
+wait $BACKEND_PID $WORKER_PID $FRONTEND_PID 
\ No newline at end of file
@@ -3,7 +3,7 @@
 # Function to cleanup background processes
 cleanup() {
     echo "🛑 Shutting down services..."
-    kill $BACKEND_PID $FRONTEND_PID 2>/dev/null
+    kill $BACKEND_PID $WORKER_PID $FRONTEND_PID 2>/dev/null
     exit 0
 }
 
@@ -16,9 +16,12 @@ cd backend
 source venv/bin/activate
 python src/main.py &
 BACKEND_PID=$!
+python src/worker.py &
+WORKER_PID=$!
 cd ..
 
 echo "[dev.sh] FastAPI backend started on port 8000 (PID $BACKEND_PID)"
+echo "[dev.sh] Assessment worker started (PID $WORKER_PID)"
 
 # Start frontend
 echo "🎨 Starting Vite frontend..."
@@ -32,4 +35,4 @@ echo "[dev.sh] Vite frontend started on port 5173 (PID $FRONTEND_PID)"
 echo "[dev.sh] Both backend and frontend are running. Press Ctrl+C to stop."
 
 # Wait for both to exit
-wait $BACKEND_PID $FRONTEND_PID
+wait $BACKEND_PID $WORKER_PID $FRONTEND_PID
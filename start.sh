@@ -5,7 +5,7 @@ echo "🚀 Starting Job Opportunities Tracker..."
 # Function to cleanup background processes
 cleanup() {
     echo "🛑 Shutting down services..."
-    kill $BACKEND_PID $FRONTEND_PID 2>/dev/null
+    kill $BACKEND_PID $WORKER_PID $FRONTEND_PID 2>/dev/null
     exit 0
 }
 
@@ -35,6 +35,13 @@ python -m uvicorn main:app --host 0.0.0.0 --port 8000 &
 BACKEND_PID=$!
 cd ..
 
+# Start the assessment worker, which processes the queued assessments
+echo "⚙️  Starting assessment worker..."
+cd backend
+python src/worker.py &
+WORKER_PID=$!
+cd ..
+
 # Wait a moment for backend to start
 sleep 3
 